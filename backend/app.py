@@ -1,6 +1,10 @@
 from fastapi import FastAPI, Query, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 import os
+import sys
+import json
+import argparse
 import asyncio
 import subprocess
 import uvicorn
@@ -11,7 +15,13 @@ import requests
 
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
-from llm_client import LLMClient
+from llm_client import LLMClient, SUMMARY_FAILED, SUMMARY_ERROR, DEFAULT_EMBEDDING_MODEL
+from llm_scheduler import SchedulerRejected, INTERACTIVE
+from rag import Conversation, ConversationStore, pack_context
+from metrics import REGISTRY
+from result_cache import ResultCache, normalize_query
+from semantic_cache import SemanticCache
+from reranker import LLMReranker
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -44,6 +54,8 @@ async def chat_with_ai(request: ChatRequest):
         response_text = await process_chat_request(request.query)
         
         return {"response": response_text}
+    except SchedulerRejected:
+        raise HTTPException(status_code=503, detail="LLM is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
@@ -51,6 +63,12 @@ async def chat_with_ai(request: ChatRequest):
 async def process_chat_request(query: str) -> str:
     
     try:
+        query_embedding = None
+        if chat_cache is not None:
+            query_embedding = await asyncio.to_thread(llm_client.get_embedding, query)
+            cached_answer = chat_cache.lookup(query_embedding)
+            if cached_answer is not None:
+                return cached_answer
        
         prompt = f"""You are a helpful, concise AI assistant with name ASHBORN AI. 
         Answer the following question directly and briefly, without links, disclaimers, or unnecessary text.
@@ -60,9 +78,10 @@ async def process_chat_request(query: str) -> str:
         """
         
       
-        response = requests.post(
-            f"{llm_client.base_url}/generate",
-            json={
+        response = await asyncio.to_thread(
+            llm_client.post,
+            "generate",
+            {
                 "model": llm_client.model_name,
                 "prompt": prompt,
                 "stream": False,
@@ -71,17 +90,22 @@ async def process_chat_request(query: str) -> str:
                     "top_p": 0.95,
                     "max_tokens": 500
                 }
-            }
+            },
+            priority=INTERACTIVE
         )
         
         if response.status_code == 200:
             result = response.json()
-            answer = result.get("response", "")
-            return answer.strip()
+            answer = result.get("response", "").strip()
+            if chat_cache is not None and answer:
+                chat_cache.add(query_embedding, answer)
+            return answer
         else:
             logger.error(f"LLM response error: {response.text}")
             return "I encountered an error processing your request."
             
+    except SchedulerRejected:
+        raise
     except Exception as e:
         logger.error(f"Chat processing error: {str(e)}")
         return "Sorry, I'm having trouble answering right now."
@@ -104,15 +128,53 @@ class RelatedRequest(BaseModel):
 class OpenFileRequest(BaseModel):
     file_path: str
 
+class AskRequest(BaseModel):
+    question: str
+    conversation_id: Optional[str] = None
+    top_k: int = 5
+    refresh: bool = False
+    # False returns a single JSON answer instead of NDJSON events
+    stream: bool = True
+
 # Application state
 vector_store = None
 doc_processor = None
 llm_client = None
+reranker = None
 indexed_folders = []
+conversations = ConversationStore()
+# Optional paraphrase-tolerant answer cache for /chat, enabled with ASHBORN_CHAT_CACHE=1
+chat_cache = SemanticCache(
+    "chat_semantic",
+    threshold=float(os.environ.get("ASHBORN_CHAT_CACHE_THRESHOLD", "0.92")),
+    ttl_seconds=float(os.environ.get("ASHBORN_CHAT_CACHE_TTL", "3600")),
+    max_entries=int(os.environ.get("ASHBORN_CHAT_CACHE_SIZE", "1000"))
+) if os.environ.get("ASHBORN_CHAT_CACHE") == "1" else None
+# Whole /search responses for the current index generation; ASHBORN_SEARCH_CACHE_MB=0 disables
+search_cache = ResultCache(
+    "search_results",
+    max_bytes=int(float(os.environ.get("ASHBORN_SEARCH_CACHE_MB", "32")) * 1024 * 1024)
+)
+
+# Approximate token budget for document context packed into an /ask prompt
+ASK_CONTEXT_TOKENS = 1500
+
+# "reader" workers serve read-only index snapshots and forward indexing to the indexer process
+ROLE = os.environ.get("ASHBORN_ROLE", "standalone")
+INDEXER_URL = os.environ.get("ASHBORN_INDEXER_URL", "http://127.0.0.1:8002")
+INDEXER_PORT = 8002
+
+async def current_indexed_folders() -> List[str]:
+    """Folders covered by the index this process is serving"""
+    if ROLE == "reader":
+        # Loading a new snapshot reads the whole index and metadata; keep it off the event loop
+        await asyncio.to_thread(vector_store.refresh)
+        return vector_store.indexed_folders
+    return indexed_folders
 
 @app.on_event("startup")
 async def startup_event():
-    global vector_store, doc_processor, llm_client
+    global vector_store, doc_processor, llm_client, reranker, conversations
     logger.info("Starting backend services...")
     
     # Check if Ollama is running and start if needed
@@ -131,16 +193,58 @@ async def startup_event():
             logger.error(f"Failed to start Ollama: {e}")
     
     # Initialize components
-    llm_client = LLMClient(model_name="gemma3:1b")
-    vector_store = VectorStore()
+    llm_client = LLMClient(
+        model_name=os.environ.get("ASHBORN_GENERATION_MODEL", "gemma3:1b"),
+        embedding_model=os.environ.get("ASHBORN_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    )
+    # Set e.g. ASHBORN_NEAR_DUP_THRESHOLD=0.9 to also collapse near-identical documents
+    near_dup_threshold = os.environ.get("ASHBORN_NEAR_DUP_THRESHOLD")
+    vector_store = VectorStore(
+        near_duplicate_threshold=float(near_dup_threshold) if near_dup_threshold else None,
+        read_only=(ROLE == "reader"),
+        llm_client=llm_client
+    )
     doc_processor = DocumentProcessor(vector_store, llm_client)
     
-    logger.info("Backend services initialized successfully")
+    # Workers aren't sticky, so readers share conversations through the storage directory
+    if ROLE == "reader":
+        conversations = ConversationStore(storage_dir=os.path.join(vector_store.storage_dir, "conversations"))
+    
+    # Optional second-pass scoring of search candidates, enabled with ASHBORN_RERANK=1
+    if os.environ.get("ASHBORN_RERANK") == "1":
+        reranker = LLMReranker(
+            llm_client,
+            model=os.environ.get("ASHBORN_RERANK_MODEL"),
+            top_n=int(os.environ.get("ASHBORN_RERANK_TOP_N", "20")),
+            budget_ms=float(os.environ.get("ASHBORN_RERANK_BUDGET_MS", "1500"))
+        )
+    
+    # The embedding model changed since the index was built: rebuild it without blocking startup
+    if vector_store.reembed_required and ROLE != "reader":
+        app.state.reembed_task = asyncio.create_task(vector_store.reembed(doc_processor.extract_text))
+    
+    logger.info(f"Backend services initialized successfully ({ROLE})")
 
 @app.get("/status")
 async def status():
     """Check if backend is running"""
-    return {"status": "online", "indexed_folders": indexed_folders}
+    return {
+        "status": "online",
+        "indexed_folders": await current_indexed_folders() if vector_store else indexed_folders,
+        "role": ROLE,
+        "llm_scheduler": llm_client.scheduler.snapshot() if llm_client else None
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint for this process only.
+    With --workers N the shared port hands each scrape to one worker, so
+    samples carry a worker label to keep per-process series apart;
+    ingestion metrics are on the indexer's own /metrics.
+    """
+    const_labels = {"worker": str(os.getpid())} if ROLE == "reader" else None
+    return PlainTextResponse(REGISTRY.render(const_labels), media_type="text/plain; version=0.0.4")
 
 @app.post("/index")
 async def index_folders(request: IndexRequest):
@@ -156,13 +260,17 @@ async def index_folders(request: IndexRequest):
         raise HTTPException(status_code=400, 
                           detail=f"Invalid folders: {invalid_folders}")
     
+    if ROLE == "reader":
+        return await forward_index_request(request)
+    
     try:
         # Reset index if folders have changed
         if set(indexed_folders) != set(request.folders):
-            vector_store.reset()
+            await asyncio.to_thread(vector_store.reset)
             
         # Process and index documents
         file_count = await doc_processor.process_folders(request.folders)
+        await asyncio.to_thread(vector_store.commit, request.folders)
         indexed_folders = request.folders
         
         return {
@@ -174,15 +282,47 @@ async def index_folders(request: IndexRequest):
         logger.error(f"Indexing error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
 
+async def forward_index_request(request: IndexRequest):
+    """Hand indexing to the indexer process, then serve its new snapshot"""
+    try:
+        response = await asyncio.to_thread(
+            requests.post, f"{INDEXER_URL}/index", json={"folders": request.folders}
+        )
+    except Exception as e:
+        logger.error(f"Indexer unreachable: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Indexer unavailable: {str(e)}")
+    
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code,
+                          detail=response.json().get("detail", response.text))
+    
+    await asyncio.to_thread(vector_store.refresh)
+    return response.json()
+
+async def retrieve(query: str, limit: int) -> List[Dict[str, Any]]:
+    """Vector search, re-ranked when enabled so only the best hits reach the LLM"""
+    if reranker is None:
+        return await vector_store.search(query, limit=limit)
+    candidates = await vector_store.search(query, limit=max(limit, reranker.top_n))
+    return await reranker.rerank(query, candidates, limit)
+
 @app.post("/search")
 async def search_documents(request: SearchRequest):
     """Search for documents using natural language query"""
-    if not indexed_folders:
+    if not await current_indexed_folders():
         raise HTTPException(status_code=400, 
                           detail="No folders indexed. Please index folders first.")
     
+    # Key on every request field so new filters are covered automatically
+    generation = vector_store.generation
+    cache_key = (normalize_query(request.query),
+                 json.dumps(request.model_dump(exclude={"query"}), sort_keys=True))
+    cached = search_cache.get(generation, cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        results = await vector_store.search(request.query, limit=request.limit)
+        results = await retrieve(request.query, request.limit)
         
         # Enhance results with summaries
         enhanced_results = []
@@ -203,10 +343,17 @@ async def search_documents(request: SearchRequest):
                 "score": result["score"],
                 "summary": mini_summary,
                 "snippet": snippet,
-                "metadata": result.get("metadata", {})
+                "metadata": result.get("metadata", {}),
+                "alternate_paths": result.get("alternate_paths", []),
+                **({"rerank_score": result["rerank_score"]} if "rerank_score" in result else {})
             })
             
-        return {"results": enhanced_results}
+        response = {"results": enhanced_results}
+        if not any(r["summary"] in (SUMMARY_FAILED, SUMMARY_ERROR) for r in enhanced_results):
+            search_cache.put(generation, cache_key, response)
+        return response
+    except SchedulerRejected:
+        raise HTTPException(status_code=503, detail="LLM is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -220,7 +367,7 @@ async def get_summary(request: SummaryRequest):
     try:
         # Extract content
         content = await doc_processor.extract_text(request.file_path)
-        print(f"[DEBUG] Extracted content (first 300 chars):\n{content[:300]}")
+        logger.debug(f"Extracted content (first 300 chars):\n{content[:300]}")
 
         # Generate summary
         summary = await llm_client.generate_summary(
@@ -228,9 +375,11 @@ async def get_summary(request: SummaryRequest):
             content=content,
             max_length=500
         )
-        print(f"[DEBUG] Generated summary:\n{summary}")
+        logger.debug(f"Generated summary:\n{summary}")
 
         return {"file_path": request.file_path, "summary": summary}
+    except SchedulerRejected:
+        raise HTTPException(status_code=503, detail="LLM is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Summary error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Summary failed: {str(e)}")
@@ -252,7 +401,10 @@ async def get_related(request: RelatedRequest):
         )
         
         # Filter out the original file
-        related = [r for r in results if r["file_path"] != request.file_path][:request.limit]
+        related = [
+            r for r in results
+            if request.file_path != r["file_path"] and request.file_path not in r.get("alternate_paths", [])
+        ][:request.limit]
         
         # Add mini summaries
         for item in related:
@@ -263,10 +415,83 @@ async def get_related(request: RelatedRequest):
             )
         
         return {"file_path": request.file_path, "related": related}
+    except SchedulerRejected:
+        raise HTTPException(status_code=503, detail="LLM is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Related docs error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Finding related docs failed: {str(e)}")
 
+@app.post("/ask")
+async def ask_documents(request: AskRequest):
+    """Answer a question from the indexed documents, streamed as NDJSON events"""
+    if not await current_indexed_folders():
+        raise HTTPException(status_code=400, 
+                          detail="No folders indexed. Please index folders first.")
+    
+    try:
+        conversation = await asyncio.to_thread(conversations.get, request.conversation_id)
+        if conversation is None or request.refresh or not conversation.sources:
+            # First turn (or explicit refresh): retrieve and pack context once
+            results = await retrieve(request.question, request.top_k)
+            context, sources = pack_context(results, token_budget=ASK_CONTEXT_TOKENS)
+            if sources:
+                conversation = await asyncio.to_thread(
+                    conversations.start, context, sources, request.conversation_id
+                )
+            else:
+                # Not stored, so the next turn retrieves again instead of reusing an empty context
+                conversation = Conversation(conversation_id=request.conversation_id, context="", sources=[])
+
+        if not request.stream:
+            answer = {"answer": "No indexed documents match this question.", "context": None}
+            if conversation.sources:
+                answer = await llm_client.answer_question(
+                    request.question, conversation.context, model_context=conversation.model_context
+                )
+                conversation.model_context = answer["context"] or conversation.model_context
+                await asyncio.to_thread(conversations.save, conversation)
+            return {
+                "conversation_id": conversation.conversation_id,
+                "sources": conversation.sources,
+                "answer": answer["answer"]
+            }
+    except SchedulerRejected:
+        raise HTTPException(status_code=503, detail="LLM is busy, please retry shortly")
+    except Exception as e:
+        logger.error(f"Ask error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Ask failed: {str(e)}")
+    
+    def event_stream():
+        yield json.dumps({
+            "type": "sources",
+            "conversation_id": conversation.conversation_id,
+            "sources": conversation.sources
+        }) + "\n"
+        
+        if not conversation.sources:
+            yield json.dumps({"type": "token", "text": "No indexed documents match this question."}) + "\n"
+            yield json.dumps({"type": "done"}) + "\n"
+            return
+        
+        try:
+            # Follow-ups continue from the model's token state instead of re-sending documents
+            for chunk in llm_client.stream_answer(
+                request.question,
+                context=conversation.context,
+                model_context=conversation.model_context
+            ):
+                if chunk.get("response"):
+                    yield json.dumps({"type": "token", "text": chunk["response"]}) + "\n"
+                if chunk.get("done"):
+                    conversation.model_context = chunk.get("context") or conversation.model_context
+                    conversations.save(conversation)
+            yield json.dumps({"type": "done"}) + "\n"
+        except Exception as e:
+            logger.error(f"Ask streaming error: {str(e)}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @app.post("/open")
 async def open_file(request: OpenFileRequest):
     """Open a file with the default system application"""
@@ -289,4 +514,35 @@ async def open_file(request: OpenFileRequest):
         raise HTTPException(status_code=500, detail=f"Opening file failed: {str(e)}")
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="127.0.0.1", port=8001)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="AI Document Search & Retrieval Assistant backend")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("ASHBORN_WORKERS", "1")),
+                        help="API worker processes; more than one starts a separate indexer process")
+    args = parser.parse_args()
+    
+    if args.workers <= 1:
+        uvicorn.run("app:app", host="127.0.0.1", port=8001)
+    else:
+        # LLM schedulers are per process: priority only orders requests within one process and
+        # the limits add up. Reserve one Ollama slot for the indexer's background work and
+        # split the rest over the workers, so bulk indexing never takes the interactive share.
+        ollama_parallel = int(os.environ.get("ASHBORN_LLM_CONCURRENCY", "2"))
+        worker_concurrency = max(1, (ollama_parallel - 1) // args.workers)
+        total_concurrency = worker_concurrency * args.workers + 1
+        if total_concurrency > ollama_parallel:
+            logger.warning(f"{args.workers} workers plus the indexer may send {total_concurrency} concurrent "
+                           f"requests; raise ASHBORN_LLM_CONCURRENCY and OLLAMA_NUM_PARALLEL to match")
+        
+        # Workers inherit these and come up as read-only snapshot readers
+        os.environ["ASHBORN_ROLE"] = "reader"
+        os.environ["ASHBORN_INDEXER_URL"] = f"http://127.0.0.1:{INDEXER_PORT}"
+        os.environ["ASHBORN_LLM_CONCURRENCY"] = str(worker_concurrency)
+        indexer = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "indexer:app", "--host", "127.0.0.1", "--port", str(INDEXER_PORT)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, ASHBORN_LLM_CONCURRENCY="1", ASHBORN_LLM_BACKGROUND_CONCURRENCY="1")
+        )
+        try:
+            uvicorn.run("app:app", host="127.0.0.1", port=8001, workers=args.workers)
+        finally:
+            indexer.terminate()
+            indexer.wait()
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Deterministic synthetic document corpus in the formats the indexer supports.
+"""
+import os
+import random
+from typing import Dict, List, Sequence
+
+FORMATS = ("txt", "md", "pdf", "docx")
+
+_VOCABULARY = (
+    "annual", "budget", "forecast", "revenue", "expense", "quarter", "policy", "compliance",
+    "contract", "vendor", "meeting", "minutes", "project", "milestone", "deadline", "risk",
+    "analysis", "customer", "support", "ticket", "release", "roadmap", "hiring", "training",
+    "security", "audit", "invoice", "payment", "inventory", "shipment", "warehouse", "report"
+)
+
+
+def _paragraphs(rng: random.Random, words: int) -> List[str]:
+    paragraphs = []
+    while words > 0:
+        length = min(words, rng.randint(40, 120))
+        sentence_words = [rng.choice(_VOCABULARY) for _ in range(length)]
+        paragraphs.append(" ".join(sentence_words).capitalize() + ".")
+        words -= length
+    return paragraphs
+
+
+def _write_txt(path: str, title: str, paragraphs: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(title + "\n\n" + "\n\n".join(paragraphs))
+
+
+def _write_md(path: str, title: str, paragraphs: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {title}\n\n" + "\n\n".join(paragraphs))
+
+
+def _write_pdf(path: str, title: str, paragraphs: List[str]):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    page = doc.new_page()
+    rect = fitz.Rect(50, 50, 545, 792)
+    page.insert_textbox(rect, title + "\n\n" + "\n\n".join(paragraphs), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def _write_docx(path: str, title: str, paragraphs: List[str]):
+    import docx
+
+    document = docx.Document()
+    document.add_heading(title, level=1)
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+_WRITERS = {"txt": _write_txt, "md": _write_md, "pdf": _write_pdf, "docx": _write_docx}
+
+
+def generate_corpus(root: str, num_documents: int = 200, formats: Sequence[str] = FORMATS,
+                    words_per_document: int = 400, duplicate_ratio: float = 0.1,
+                    seed: int = 42) -> Dict[str, int]:
+    """
+    Write ``num_documents`` files under ``root``, cycling through ``formats``.
+    A ``duplicate_ratio`` share of them repeat an earlier document's text in
+    another folder, mirroring file shares with copied documents.
+    Returns the number of files written per format.
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    counts = {fmt: 0 for fmt in formats}
+    written = []
+
+    for i in range(num_documents):
+        fmt = formats[i % len(formats)]
+        if written and rng.random() < duplicate_ratio:
+            title, paragraphs = rng.choice(written)
+        else:
+            title = f"Document {i}: {rng.choice(_VOCABULARY)} {rng.choice(_VOCABULARY)}"
+            paragraphs = _paragraphs(rng, words_per_document)
+            written.append((title, paragraphs))
+
+        folder = os.path.join(root, f"folder_{i % 10}")
+        os.makedirs(folder, exist_ok=True)
+        _WRITERS[fmt](os.path.join(folder, f"doc_{i:06d}.{fmt}"), title, paragraphs)
+        counts[fmt] += 1
+
+    return counts
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the parts of the Ollama HTTP API the backend uses.
+
+Embeddings and generations are deterministic functions of the request text,
+so benchmark runs are repeatable, and every endpoint can be given a fixed
+latency to model a real model server.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import numpy as np
+
+_WORDS = ("document", "report", "budget", "quarter", "policy", "summary", "project",
+          "meeting", "revenue", "contract", "analysis", "team", "schedule", "review")
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8", "ignore")).digest()[:8], "little")
+
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    rng = np.random.default_rng(_seed(text))
+    return rng.standard_normal(dimension, dtype=np.float32).tolist()
+
+
+def fake_generation(prompt: str, num_tokens: int) -> List[str]:
+    rng = np.random.default_rng(_seed(prompt))
+    return [_WORDS[i] + " " for i in rng.integers(0, len(_WORDS), size=num_tokens)]
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server serving /api/tags, /api/pull, /api/embeddings and /api/generate
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dimension: int = 768,
+                 embed_latency: float = 0.0, generate_latency: float = 0.0,
+                 tokens_per_second: float = 0.0, num_tokens: int = 40):
+        self.dimension = dimension
+        self.embed_latency = embed_latency
+        self.generate_latency = generate_latency
+        self.tokens_per_second = tokens_per_second
+        self.num_tokens = num_tokens
+        self.request_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def _count(self, path: str):
+        with self._counts_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, body: Dict[str, Any], status: int = 200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                server._count(self.path)
+                if self.path == "/api/tags":
+                    self._send_json({"models": [
+                        {"name": "gemma3:1b", "digest": "fake-generation"},
+                        {"name": "nomic-embed-text:latest", "digest": "fake-embedding"}
+                    ]})
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                server._count(self.path)
+                body = self._read_json()
+                if self.path == "/api/pull":
+                    self._send_json({"status": "success"})
+                elif self.path == "/api/embeddings":
+                    time.sleep(server.embed_latency)
+                    text = f"{body.get('model', '')}\0{body.get('prompt', '')}"
+                    self._send_json({"embedding": fake_embedding(text, server.dimension)})
+                elif self.path == "/api/generate":
+                    self._generate(body)
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def _generate(self, body: Dict[str, Any]):
+                time.sleep(server.generate_latency)
+                tokens = fake_generation(body.get("prompt", ""), server.num_tokens)
+                per_token = 1.0 / server.tokens_per_second if server.tokens_per_second else 0.0
+                stats = {
+                    "done": True,
+                    "context": [1, 2, 3],
+                    "eval_count": len(tokens),
+                    "eval_duration": int(max(per_token * len(tokens), 1e-6) * 1e9)
+                }
+
+                if not body.get("stream", True):
+                    time.sleep(per_token * len(tokens))
+                    self._send_json({"response": "".join(tokens), **stats})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(per_token)
+                    self._write_chunk({"response": token, "done": False})
+                self._write_chunk({"response": "", **stats})
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, body: Dict[str, Any]):
+                data = json.dumps(body).encode() + b"\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a deterministic fake Ollama server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--generate-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        port=args.port,
+        dimension=args.dimension,
+        embed_latency=args.embed_latency_ms / 1000,
+        generate_latency=args.generate_latency_ms / 1000,
+        tokens_per_second=args.tokens_per_second
+    )
+    print(f"Fake Ollama listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Reproducible performance benchmarks for the backend.
+
+Runs against a local fake Ollama server (see fake_ollama.py), so numbers
+reflect this codebase rather than the model. From the backend directory:
+
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --sizes 10000,100000 --skip-e2e
+
+Results are written as JSON together with the git commit, so runs from
+different commits can be compared side by side.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import faiss
+import numpy as np
+
+from benchmarks.corpus import FORMATS, generate_corpus
+from benchmarks.fake_ollama import FakeOllamaServer
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+        "samples": len(samples)
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _corpus_files(root: str) -> List[str]:
+    return sorted(os.path.join(dirpath, f) for dirpath, _, files in os.walk(root) for f in files)
+
+
+class _SyntheticDocuments(Mapping):
+    """Document metadata for a synthetic index, generated on access instead of held in memory"""
+
+    def __init__(self, size: int, paths: List[str]):
+        self._size = size
+        self._paths = paths
+
+    def __getitem__(self, doc_id):
+        if not 0 <= doc_id < self._size:
+            raise KeyError(doc_id)
+        return {
+            "file_path": self._paths[doc_id % len(self._paths)],
+            "metadata": {},
+            "snippet": f"synthetic document {doc_id}",
+            "alternate_paths": []
+        }
+
+    def __iter__(self):
+        return iter(range(self._size))
+
+    def __len__(self):
+        return self._size
+
+
+def bench_ingestion(corpus_dir: str, storage_dir: str, client) -> Tuple[Dict[str, Any], Any]:
+    from document_processor import DocumentProcessor
+    from metrics import INGESTED_BYTES
+    from vector_store import VectorStore
+
+    store = VectorStore(storage_dir=storage_dir, llm_client=client)
+    processor = DocumentProcessor(store, client)
+
+    bytes_before = INGESTED_BYTES.value()
+    start = time.perf_counter()
+    file_count = asyncio.run(processor.process_folders([corpus_dir]))
+    elapsed = time.perf_counter() - start
+    ingested_bytes = INGESTED_BYTES.value() - bytes_before
+
+    return {
+        "files": file_count,
+        "vectors": store.index.ntotal,
+        "seconds": elapsed,
+        "files_per_second": file_count / elapsed if elapsed else 0.0,
+        "text_mb_per_second": ingested_bytes / 1e6 / elapsed if elapsed else 0.0
+    }, store
+
+
+def bench_search(store, size: int, queries: int, paths: List[str], seed: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    with store._lock:
+        store.index = faiss.IndexFlatL2(store.dimension)
+        for start in range(0, size, 50000):
+            batch = rng.standard_normal((min(50000, size - start), store.dimension), dtype=np.float32)
+            faiss.normalize_L2(batch)
+            store.index.add(batch)
+        store.documents = _SyntheticDocuments(size, paths)
+        store.doc_count = size
+
+    async def run():
+        search_times, faiss_times = [], []
+        for i in range(queries):
+            query = f"benchmark query {i}"
+            start = time.perf_counter()
+            await store.search(query, limit=5)
+            search_times.append(time.perf_counter() - start)
+
+            vector = np.array([store._prepare_vector(rng.standard_normal(store.dimension))], dtype=np.float32)
+            faiss.normalize_L2(vector)
+            start = time.perf_counter()
+            store.index.search(vector, 10)
+            faiss_times.append(time.perf_counter() - start)
+        return search_times, faiss_times
+
+    search_times, faiss_times = asyncio.run(run())
+    return {
+        "vectors": size,
+        "dimension": store.dimension,
+        "vector_store_search": _percentiles(search_times),
+        "faiss_only": _percentiles(faiss_times)
+    }
+
+
+def bench_e2e_search(store, client, corpus_dir: str, requests_count: int) -> Dict[str, Any]:
+    import requests
+    import uvicorn
+
+    import app as app_module
+    from utils import find_free_port
+
+    app_module.llm_client = client
+    app_module.vector_store = store
+    app_module.indexed_folders = [corpus_dir]
+
+    port = find_free_port(18001, 18100)
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port,
+                                           lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        latencies = []
+        for i in range(requests_count):
+            start = time.perf_counter()
+            response = requests.post(f"http://127.0.0.1:{port}/search",
+                                     json={"query": f"budget forecast {i}", "limit": 5})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    return {"requests": requests_count, "latency": _percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, search and /search end to end")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--documents", type=int, default=200, help="Synthetic corpus size")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Index sizes for search benchmarks")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per index size")
+    parser.add_argument("--e2e-requests", type=int, default=50)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--generate-latency-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args()
+
+    config = vars(args).copy()
+    results: Dict[str, Any] = {}
+
+    with FakeOllamaServer(dimension=args.dimension,
+                          embed_latency=args.embed_latency_ms / 1000,
+                          generate_latency=args.generate_latency_ms / 1000,
+                          tokens_per_second=args.tokens_per_second) as fake, \
+            tempfile.TemporaryDirectory(prefix="ashborn-bench-") as workdir:
+        # Point every LLMClient at the fake server, including ones created internally
+        os.environ["OLLAMA_API_URL"] = fake.base_url
+        from llm_client import LLMClient
+        client = LLMClient()
+
+        corpus_dir = os.path.join(workdir, "corpus")
+        results["corpus"] = generate_corpus(corpus_dir, num_documents=args.documents,
+                                            formats=args.formats.split(","), seed=args.seed)
+
+        print("Benchmarking ingestion...")
+        results["ingestion"], store = bench_ingestion(corpus_dir, os.path.join(workdir, "store"), client)
+
+        if not args.skip_e2e:
+            print("Benchmarking /search end to end...")
+            results["e2e_search"] = bench_e2e_search(store, client, corpus_dir, args.e2e_requests)
+
+        results["search"] = []
+        paths = _corpus_files(corpus_dir)
+        for size in (int(s) for s in args.sizes.split(",") if s):
+            print(f"Benchmarking VectorStore.search at {size} vectors...")
+            results["search"].append(bench_search(store, size, args.queries, paths, args.seed))
+
+        results["fake_ollama_requests"] = fake.request_counts
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "faiss": getattr(faiss, "__version__", "unknown"),
+        "config": config,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
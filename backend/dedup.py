@@ -0,0 +1,93 @@
+import hashlib
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 31-bit Mersenne prime keeps a * h + b inside uint64 for 31-bit shingle hashes
+_PRIME = (1 << 31) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so layout-only differences hash identically"""
+    return " ".join(text.split())
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the normalized document text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8", "ignore")).hexdigest()
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures over word shingles
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=(num_perm, 1)).astype(np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        words = normalize_text(text).lower().split(" ")
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = [zlib.crc32(s.encode("utf-8", "ignore")) & _PRIME for s in shingles]
+        return np.array(hashes, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingle_hashes(text)
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        # Work in column blocks so very large documents don't allocate num_perm x N at once
+        for start in range(0, len(hashes), 4096):
+            block = hashes[start:start + 4096][np.newaxis, :]
+            permuted = (self._a * block + self._b) % _PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+
+class MinHashIndex:
+    """
+    LSH index over MinHash signatures for near-duplicate lookup
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.signatures: Dict[int, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, doc_id: int, signature: np.ndarray):
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(doc_id)
+
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        """Return the most similar indexed doc id above the threshold, if any"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best_id, best_score = None, self.threshold
+        for doc_id in candidates:
+            score = float(np.mean(self.signatures[doc_id] == signature))
+            if score >= best_score:
+                best_id, best_score = doc_id, score
+        return best_id
+
+    def clear(self):
+        self.signatures = {}
+        self._buckets = {}
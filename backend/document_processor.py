@@ -1,8 +1,14 @@
 import os
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from unstructured.partition.auto import partition
 
+from metrics import EXTRACTION_SECONDS, INGESTED_DOCUMENTS, INGESTED_BYTES
+
+# Files in flight during indexing; their embeddings still queue at the LLM scheduler's background limit
+INDEX_WORKERS = int(os.environ.get("ASHBORN_INDEX_WORKERS", "4"))
+
 class DocumentProcessor:
     def __init__(self, vector_store, llm_client):
         """
@@ -13,6 +19,9 @@ class DocumentProcessor:
         """
         self.vector_store = vector_store
         self.llm_client = llm_client
+        # Indexing gets its own threads: parked in asyncio's shared default pool, waiting
+        # background embeddings would hold every thread and queue interactive calls behind them
+        self._executor = ThreadPoolExecutor(max_workers=INDEX_WORKERS, thread_name_prefix="indexing")
 
     async def process_folders(self, folder_paths: List[str]) -> int:
         """
@@ -29,8 +38,14 @@ class DocumentProcessor:
                     if self._is_supported_file(file_path):
                         all_files.append(file_path)
 
-        tasks = [self._process_and_store(file) for file in all_files]
-        await asyncio.gather(*tasks)
+        # A few workers pull from one shared iterator rather than one task per file
+        pending = iter(all_files)
+
+        async def worker():
+            for file_path in pending:
+                await self._process_and_store(file_path)
+
+        await asyncio.gather(*(worker() for _ in range(INDEX_WORKERS)))
         return len(all_files)
 
     async def _process_and_store(self, file_path: str):
@@ -39,10 +54,12 @@ class DocumentProcessor:
 
         :param file_path: Full path of the file to process.
         """
+        loop = asyncio.get_running_loop()
         try:
-            content = await asyncio.to_thread(self.extract_text_sync, file_path)
+            content = await loop.run_in_executor(self._executor, self.extract_text_sync, file_path)
             if not content or not content.strip():
                 print(f"[SKIPPED] Empty or unreadable content in: {file_path}")
+                INGESTED_DOCUMENTS.inc(outcome="skipped")
                 return
 
             metadata = {
@@ -50,11 +67,17 @@ class DocumentProcessor:
                 "path": file_path
             }
 
-            result = self.vector_store.add_document(file_path, content, metadata)
+            # Embedding may queue behind interactive LLM traffic, so keep it off the event loop
+            result = await loop.run_in_executor(
+                self._executor, self.vector_store.add_document, file_path, content, metadata
+            )
             if not result:
                 print(f"[FAIL] Failed to add: {file_path}")
+            INGESTED_DOCUMENTS.inc(outcome="indexed" if result else "failed")
+            INGESTED_BYTES.inc(len(content.encode("utf-8", "ignore")))
         except Exception as e:
             print(f"[ERROR] Error processing {file_path}: {e}")
+            INGESTED_DOCUMENTS.inc(outcome="failed")
 
     def extract_text_sync(self, file_path: str) -> str:
         """
@@ -63,7 +86,9 @@ class DocumentProcessor:
         :param file_path: Path to the document.
         :return: Extracted text as a string.
         """
-        elements = partition(filename=file_path)
+        file_format = os.path.splitext(file_path)[1].lower().lstrip(".") or "unknown"
+        with EXTRACTION_SECONDS.time(format=file_format):
+            elements = partition(filename=file_path)
         return "\n".join([el.text for el in elements if el.text is not None])
 
     async def extract_text(self, file_path: str) -> str:
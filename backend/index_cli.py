@@ -0,0 +1,88 @@
+"""
+Export and import pre-built index bundles.
+
+    python index_cli.py export ./bundle
+    python index_cli.py import ./bundle --remap /home/alice/docs=/srv/docs
+    python index_cli.py import ./extra-bundle --merge
+
+A bundle is a directory holding the FAISS index, document metadata as JSON
+and a manifest with the embedding model and checksums. Run this while the
+backend is stopped; it writes the same storage directory the server uses.
+"""
+import os
+import sys
+import argparse
+import logging
+
+from vector_store import VectorStore
+from llm_client import LLMClient, DEFAULT_EMBEDDING_MODEL
+from utils import is_port_in_use
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_PORTS = (8001, 8002)
+
+
+def _parse_remap(values):
+    path_map = []
+    for value in values or []:
+        old, sep, new = value.partition("=")
+        if not sep or not old:
+            raise argparse.ArgumentTypeError(f"Invalid --remap {value!r}, expected OLD=NEW")
+        path_map.append((old, new))
+    return path_map
+
+
+def _open_store(storage_dir):
+    llm_client = LLMClient(
+        model_name=os.environ.get("ASHBORN_GENERATION_MODEL", "gemma3:1b"),
+        embedding_model=os.environ.get("ASHBORN_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    )
+    return VectorStore(storage_dir=storage_dir, llm_client=llm_client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and import index bundles")
+    parser.add_argument("--storage-dir", help="Vector store directory (defaults to the backend's)")
+    parser.add_argument("--force", action="store_true", help="Run even if the backend appears to be running")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the current index to a bundle directory")
+    export_parser.add_argument("bundle_dir")
+
+    import_parser = subparsers.add_parser("import", help="Load a bundle into the index")
+    import_parser.add_argument("bundle_dir")
+    import_parser.add_argument("--merge", action="store_true",
+                               help="Add to the existing index instead of replacing it")
+    import_parser.add_argument("--remap", action="append", metavar="OLD=NEW",
+                               help="Rewrite document paths starting with OLD to start with NEW; repeatable")
+    import_parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification")
+    args = parser.parse_args()
+
+    running = [port for port in BACKEND_PORTS if is_port_in_use(port)]
+    if running and not args.force:
+        logger.error(f"Backend appears to be running on port(s) {running}; stop it first or pass --force")
+        return 1
+
+    try:
+        path_map = _parse_remap(getattr(args, "remap", None))
+        store = _open_store(args.storage_dir)
+        if args.command == "export":
+            manifest = store.export_bundle(args.bundle_dir)
+            logger.info(f"Exported {manifest['document_count']} documents to {args.bundle_dir}")
+        else:
+            added = store.import_bundle(args.bundle_dir, path_map=path_map,
+                                        merge=args.merge, verify=not args.no_verify)
+            logger.info(f"Imported {added} documents; index now holds {store.doc_count} "
+                        f"at generation {store.generation}")
+            if store.reembed_required:
+                logger.warning("Bundle uses a different embedding model; the backend will re-embed it on startup")
+        return 0
+    except Exception as e:
+        logger.error(f"{args.command} failed: {str(e)}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Indexer service for multi-worker serving.
+
+Owns the only writable VectorStore. API workers started with
+ASHBORN_ROLE=reader forward /index here and serve searches from the
+read-only snapshots this process publishes after every indexing commit.
+
+LLM scheduling is per process. app.py starts this process with a single
+Ollama slot, so its background embeddings never take more than one slot.
+The remaining slots belong to the workers' interactive traffic.
+
+Metrics live in each process's own registry: scrape this process's
+/metrics for ingestion, extraction and background embedding, and each
+API worker separately for query-side metrics.
+"""
+import os
+import asyncio
+import logging
+from typing import List
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from document_processor import DocumentProcessor
+from vector_store import VectorStore
+from llm_client import LLMClient, DEFAULT_EMBEDDING_MODEL
+from metrics import REGISTRY
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="AI Document Assistant Indexer")
+
+class IndexRequest(BaseModel):
+    folders: List[str]
+
+# Indexer state
+vector_store = None
+doc_processor = None
+index_lock = asyncio.Lock()
+
+@app.on_event("startup")
+async def startup_event():
+    global vector_store, doc_processor
+    llm_client = LLMClient(
+        model_name=os.environ.get("ASHBORN_GENERATION_MODEL", "gemma3:1b"),
+        embedding_model=os.environ.get("ASHBORN_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    )
+    near_dup_threshold = os.environ.get("ASHBORN_NEAR_DUP_THRESHOLD")
+    vector_store = VectorStore(
+        near_duplicate_threshold=float(near_dup_threshold) if near_dup_threshold else None,
+        llm_client=llm_client
+    )
+    doc_processor = DocumentProcessor(vector_store, llm_client)
+    if vector_store.reembed_required:
+        app.state.reembed_task = asyncio.create_task(vector_store.reembed(doc_processor.extract_text))
+    logger.info(f"Indexer ready at generation {vector_store.generation}")
+
+@app.get("/status")
+async def status():
+    return {
+        "status": "online",
+        "indexed_folders": vector_store.indexed_folders,
+        "generation": vector_store.generation,
+        "indexing": index_lock.locked()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint for indexing metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/index")
+async def index_folders(request: IndexRequest):
+    """Index folders and publish the result as a new snapshot generation"""
+    if not request.folders:
+        raise HTTPException(status_code=400, detail="No folders provided")
+
+    invalid_folders = [f for f in request.folders if not os.path.isdir(f)]
+    if invalid_folders:
+        raise HTTPException(status_code=400,
+                          detail=f"Invalid folders: {invalid_folders}")
+
+    # One writer at a time; overlapping requests queue behind the running one
+    async with index_lock:
+        try:
+            if set(vector_store.indexed_folders) != set(request.folders):
+                await asyncio.to_thread(vector_store.reset)
+
+            file_count = await doc_processor.process_folders(request.folders)
+            await asyncio.to_thread(vector_store.commit, request.folders)
+
+            return {
+                "status": "success",
+                "indexed_files": file_count,
+                "folders": request.folders,
+                "generation": vector_store.generation
+            }
+        except Exception as e:
+            logger.error(f"Indexing error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
@@ -1,52 +1,75 @@
+import os
 import json
+import asyncio
 import requests
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
+
+from llm_scheduler import LLMScheduler, SchedulerRejected, get_default_scheduler, INTERACTIVE
+from metrics import EMBEDDING_SECONDS, LLM_GENERATION_SECONDS, LLM_TOKENS_PER_SECOND
 
 logger = logging.getLogger(__name__)
 
+# Placeholder summaries returned when generation fails; callers must not cache these
+SUMMARY_FAILED = "Summary generation failed."
+SUMMARY_ERROR = "Error generating summary."
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+
+
+def _full_model_name(name: str) -> str:
+    """Ollama lists untagged models as name:latest"""
+    return name if ":" in name else f"{name}:latest"
+
 class LLMClient:
     """
     Client for interacting with Ollama LLM
     """
     
-    def __init__(self, model_name: str = "gemma3:1b"):
-        self.base_url = "http://localhost:11434/api"
+    def __init__(self, model_name: str = "gemma3:1b", scheduler: Optional[LLMScheduler] = None,
+                 base_url: Optional[str] = None, embedding_model: str = DEFAULT_EMBEDDING_MODEL):
+        self.base_url = base_url or os.environ.get("OLLAMA_API_URL", "http://localhost:11434/api")
+        # Generation and embeddings use separate models; a dedicated embedder is faster and better
         self.model_name = model_name
+        self.embedding_model = embedding_model
+        self.model_digests: Dict[str, str] = {}
+        # Every request to Ollama goes through one scheduler per process
+        self.scheduler = scheduler or get_default_scheduler()
         
         # Ensure model is available
         self._ensure_model()
     
     def _ensure_model(self):
-        """Check if model is available and pull if not"""
+        """Check if models are available and pull any that are missing"""
         try:
             # List available models
             response = requests.get(f"{self.base_url}/tags")
             if response.status_code == 200:
                 models = response.json().get("models", [])
-                available_models = [m["name"] for m in models]
+                self.model_digests = {m["name"]: m.get("digest", "") for m in models}
                 
-                if self.model_name not in available_models:
-                    logger.info(f"Model {self.model_name} not found. Pulling...")
-                    self._pull_model()
-                else:
-                    logger.info(f"Model {self.model_name} already available")
+                for model in dict.fromkeys([self.model_name, self.embedding_model]):
+                    if _full_model_name(model) not in self.model_digests:
+                        logger.info(f"Model {model} not found. Pulling...")
+                        self._pull_model(model)
+                    else:
+                        logger.info(f"Model {model} already available")
             else:
                 logger.warning("Failed to check models, will attempt to use anyway")
         except Exception as e:
             logger.error(f"Error checking models: {str(e)}")
     
-    def _pull_model(self):
+    def _pull_model(self, model: str):
         """Pull model from Ollama"""
         try:
             response = requests.post(
                 f"{self.base_url}/pull",
-                json={"name": self.model_name}
+                json={"name": model}
             )
             
             if response.status_code == 200:
-                logger.info(f"Successfully pulled model {self.model_name}")
+                logger.info(f"Successfully pulled model {model}")
                 return True
             else:
                 logger.error(f"Failed to pull model: {response.text}")
@@ -55,7 +78,52 @@ class LLMClient:
             logger.error(f"Error pulling model: {str(e)}")
             return False
     
-    def get_embedding(self, text: str) -> List[float]:
+    def embedding_model_info(self, model: Optional[str] = None) -> Dict[str, str]:
+        """Name and version (Ollama digest) of an embedding model, recorded with the index"""
+        model = model or self.embedding_model
+        return {"name": model, "version": self.model_digests.get(_full_model_name(model), "unknown")}
+
+    def post(self, endpoint: str, payload: Dict[str, Any], priority: str = INTERACTIVE,
+             timeout: Optional[float] = None, deadline: Optional[float] = None) -> requests.Response:
+        """
+        Send a non-streaming request to Ollama through the scheduler.
+        Identical in-flight payloads share a single upstream call.
+        With a ``deadline`` (time.monotonic()), the request is dropped rather than sent late.
+        """
+        # Only merge callers of the same class: an interactive request must not wait on a queued
+        # background one, and a caller without a deadline must not inherit a leader's timeout
+        key = (endpoint, priority, deadline is not None, json.dumps(payload, sort_keys=True))
+        return self.scheduler.run(self._send, endpoint, payload, priority, timeout, deadline,
+                                  priority=priority, key=key, deadline=deadline)
+
+    def _send(self, endpoint: str, payload: Dict[str, Any], priority: str,
+              timeout: Optional[float] = None, deadline: Optional[float] = None) -> requests.Response:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Deadline passed before sending {endpoint} request")
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        start = time.perf_counter()
+        response = requests.post(f"{self.base_url}/{endpoint}", json=payload, timeout=timeout)
+        elapsed = time.perf_counter() - start
+
+        if endpoint == "embeddings":
+            EMBEDDING_SECONDS.observe(elapsed, priority=priority)
+        elif endpoint == "generate":
+            LLM_GENERATION_SECONDS.observe(elapsed, priority=priority)
+            if response.status_code == 200:
+                self._observe_throughput(response.json())
+        return response
+
+    def _observe_throughput(self, result: Dict[str, Any]):
+        """Record tokens/s from the eval counters Ollama attaches to finished generations"""
+        eval_count = result.get("eval_count")
+        eval_duration = result.get("eval_duration")  # nanoseconds
+        if eval_count and eval_duration:
+            LLM_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9))
+
+    def get_embedding(self, text: str, priority: str = INTERACTIVE, model: Optional[str] = None) -> List[float]:
         """
         Get embedding vector for text
         """
@@ -66,9 +134,10 @@ class LLMClient:
             
             text = text[:10000]  # Limit text length
             
-            response = requests.post(
-                f"{self.base_url}/embeddings",
-                json={"model": self.model_name, "prompt": text}
+            response = self.post(
+                "embeddings",
+                {"model": model or self.embedding_model, "prompt": text},
+                priority=priority
             )
             
             if response.status_code == 200:
@@ -78,6 +147,8 @@ class LLMClient:
                 logger.error(f"Embedding API error: {response.text}")
                 # Return empty vector as fallback
                 return [0.0] * 768
+        except SchedulerRejected:
+            raise
         except Exception as e:
             logger.error(f"Error getting embedding: {str(e)}")
             # Return empty vector as fallback
@@ -108,10 +179,11 @@ File: {file_path}
 Create a clear and informative summary in less than {max_length} characters.
 """
             
-            # Send request to Ollama
-            response = requests.post(
-                f"{self.base_url}/generate",
-                json={
+            # Send request to Ollama without blocking the event loop while queued
+            response = await asyncio.to_thread(
+                self.post,
+                "generate",
+                {
                     "model": self.model_name,
                     "prompt": prompt,
                     "stream": False,
@@ -135,51 +207,96 @@ Create a clear and informative summary in less than {max_length} characters.
                 return summary
             else:
                 logger.error(f"Summary generation error: {response.text}")
-                return "Summary generation failed."
+                return SUMMARY_FAILED
                 
+        except SchedulerRejected:
+            raise
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
-            return "Error generating summary."
+            return SUMMARY_ERROR
     
-    async def answer_question(self, question: str, context: str) -> str:
-        """
-        Answer a question based on document context
-        """
-        try:
-            # Prepare RAG prompt
-            prompt = f"""Answer the following question based on the provided document content:
+    def _build_answer_prompt(self, question: str, context: str) -> str:
+        return f"""Answer the following question based on the provided document content:
 
 Question: {question}
 
 Document Content:
-{context[:4000]}
+{context}
 
 Provide a clear, factual answer based only on the information in the document. If the document doesn't contain information to answer the question, simply state that.
+Sources in the document content are numbered like [1]; cite the ones you use in the same form.
 """
-            
+
+    def _answer_payload(self, question: str, context: Optional[str],
+                        model_context: Optional[List[int]], stream: bool) -> Dict[str, Any]:
+        if model_context:
+            prompt = f"""Follow-up question: {question}
+
+Answer using the same document content as before and cite sources like [1]."""
+        else:
+            prompt = self._build_answer_prompt(question, context or "")
+
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.2,
+                "top_p": 0.95,
+                "max_tokens": 500
+            }
+        }
+        if model_context:
+            payload["context"] = model_context
+        return payload
+
+    async def answer_question(self, question: str, context: str,
+                              model_context: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Answer a question based on document context.
+        ``context`` is sent whole, as in stream_answer; budget it with rag.pack_context.
+        Returns the answer text and the model's token state for continuing the conversation.
+        """
+        try:
             # Send request to Ollama
-            response = requests.post(
-                f"{self.base_url}/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.2,
-                        "top_p": 0.95,
-                        "max_tokens": 500
-                    }
-                }
+            response = await asyncio.to_thread(
+                self.post,
+                "generate",
+                self._answer_payload(question, context, model_context, stream=False)
             )
             
             if response.status_code == 200:
                 result = response.json()
-                answer = result.get("response", "")
-                return answer.strip()
+                return {"answer": result.get("response", "").strip(), "context": result.get("context")}
             else:
                 logger.error(f"Question answering error: {response.text}")
-                return "Failed to answer question."
+                return {"answer": "Failed to answer question.", "context": None}
                 
+        except SchedulerRejected:
+            raise
         except Exception as e:
             logger.error(f"Error answering question: {str(e)}")
-            return "Error processing your question."
\ No newline at end of file
+            return {"answer": "Error processing your question.", "context": None}
+
+    def stream_answer(self, question: str, context: Optional[str] = None,
+                      model_context: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a grounded answer as raw Ollama chunks.
+        Pass the ``context`` tokens from a previous turn's final chunk as
+        ``model_context`` to continue it without re-sending the documents.
+        """
+        payload = self._answer_payload(question, context, model_context, stream=True)
+
+        # Streams can't be coalesced, but still hold an interactive slot until finished
+        with self.scheduler.slot(INTERACTIVE):
+            start = time.perf_counter()
+            with requests.post(f"{self.base_url}/generate", json=payload, stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"Question answering error: {response.text}")
+                for line in response.iter_lines():
+                    if line:
+                        chunk = json.loads(line)
+                        if chunk.get("done"):
+                            LLM_GENERATION_SECONDS.observe(time.perf_counter() - start, priority=INTERACTIVE)
+                            self._observe_throughput(chunk)
+                        yield chunk
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from metrics import LLM_QUEUE_SECONDS, LLM_REQUESTS
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+
+class SchedulerRejected(Exception):
+    """Raised when a priority class queue is full and the request is turned away"""
+
+
+class _InFlight:
+    """Result slot shared by callers coalesced onto the same request"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error: Optional[BaseException] = None
+
+    def set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def set_error(self, error: BaseException):
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class LLMScheduler:
+    """
+    Coordinates all requests to the local Ollama instance.
+
+    Interactive requests always start before queued background ones, each class
+    has its own concurrency limit under a global one, identical in-flight
+    requests are coalesced, and a full queue rejects immediately.
+    """
+
+    def __init__(self, max_concurrency: int = 2,
+                 class_limits: Optional[Dict[str, int]] = None,
+                 max_queue: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.class_limits = {INTERACTIVE: max_concurrency, BACKGROUND: 1}
+        self.class_limits.update(class_limits or {})
+        self.max_queue = {INTERACTIVE: 32, BACKGROUND: 256}
+        self.max_queue.update(max_queue or {})
+
+        self._cond = threading.Condition()
+        self._running = {p: 0 for p in PRIORITIES}
+        self._waiting = {p: 0 for p in PRIORITIES}
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._stats = {
+            p: {"submitted": 0, "coalesced": 0, "rejected": 0, "expired": 0,
+                "queue_time_total": 0.0, "queue_time_max": 0.0}
+            for p in PRIORITIES
+        }
+        self._queue_times = {p: deque(maxlen=1024) for p in PRIORITIES}
+
+    def _can_start(self, priority: str) -> bool:
+        if sum(self._running.values()) >= self.max_concurrency:
+            return False
+        if self._running[priority] >= self.class_limits[priority]:
+            return False
+        # Background work yields to any waiting interactive request
+        return priority == INTERACTIVE or self._waiting[INTERACTIVE] == 0
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, deadline: Optional[float] = None):
+        """
+        Hold one execution slot of the given class for the duration of the block.
+        Raises TimeoutError if ``deadline`` (time.monotonic()) passes while still queued.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        with self._cond:
+            stats = self._stats[priority]
+            stats["submitted"] += 1
+            if self._waiting[priority] >= self.max_queue[priority]:
+                stats["rejected"] += 1
+                LLM_REQUESTS.inc(priority=priority, outcome="rejected")
+                raise SchedulerRejected(f"{priority} queue is full")
+
+            queued_at = time.monotonic()
+            self._waiting[priority] += 1
+            try:
+                while not self._can_start(priority):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        stats["expired"] += 1
+                        LLM_REQUESTS.inc(priority=priority, outcome="expired")
+                        raise TimeoutError(f"{priority} request expired while queued")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting[priority] -= 1
+                # A departing interactive waiter may unblock background work
+                self._cond.notify_all()
+            self._running[priority] += 1
+
+            queue_time = time.monotonic() - queued_at
+            stats["queue_time_total"] += queue_time
+            stats["queue_time_max"] = max(stats["queue_time_max"], queue_time)
+            self._queue_times[priority].append(queue_time)
+            LLM_QUEUE_SECONDS.observe(queue_time, priority=priority)
+            LLM_REQUESTS.inc(priority=priority, outcome="admitted")
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running[priority] -= 1
+                self._cond.notify_all()
+
+    def run(self, fn: Callable[..., Any], *args, priority: str = INTERACTIVE,
+            key: Optional[Hashable] = None, deadline: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run ``fn`` in the calling thread once a slot is free.
+        Callers passing the same ``key`` while a request is in flight share its result.
+        """
+        if key is None:
+            with self.slot(priority, deadline):
+                return fn(*args, **kwargs)
+
+        with self._cond:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                self._stats[priority]["coalesced"] += 1
+                LLM_REQUESTS.inc(priority=priority, outcome="coalesced")
+        if not leader:
+            return flight.wait()
+
+        try:
+            with self.slot(priority, deadline):
+                result = fn(*args, **kwargs)
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_error(e)
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue depths and queueing-delay statistics per class"""
+        with self._cond:
+            result = {}
+            for p in PRIORITIES:
+                stats = dict(self._stats[p])
+                samples = sorted(self._queue_times[p])
+                started = stats["submitted"] - stats["rejected"] - stats["expired"]
+                stats.update({
+                    "running": self._running[p],
+                    "waiting": self._waiting[p],
+                    "queue_time_avg": stats["queue_time_total"] / started if started else 0.0,
+                    "queue_time_p50": samples[len(samples) // 2] if samples else 0.0,
+                    "queue_time_p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+                })
+                result[p] = stats
+            return result
+
+
+_default_scheduler: Optional[LLMScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> LLMScheduler:
+    """
+    Process-wide scheduler shared by every LLMClient that isn't given its own.
+    Priority and limits apply within this process only; with several
+    processes (app.py --workers) each gets its own share of the limit.
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            # Match this to OLLAMA_NUM_PARALLEL on the Ollama side
+            _default_scheduler = LLMScheduler(
+                max_concurrency=int(os.environ.get("ASHBORN_LLM_CONCURRENCY", "2")),
+                class_limits={BACKGROUND: int(os.environ.get("ASHBORN_LLM_BACKGROUND_CONCURRENCY", "1"))}
+            )
+        return _default_scheduler
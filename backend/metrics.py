@@ -0,0 +1,178 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond FAISS scans up to slow LLM generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def _samples(self, const: Tuple[Tuple[str, str], ...] = ()) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples(_label_key(const_labels or {})))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self, const: Tuple[Tuple[str, str], ...] = ()) -> List[str]:
+        return [f"{self.name}{_format_labels(const + k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def _samples(self, const: Tuple[Tuple[str, str], ...] = ()) -> List[str]:
+        return [f"{self.name}{_format_labels(const + k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, const: Tuple[Tuple[str, str], ...] = ()) -> List[str]:
+        lines = []
+        for key, series in self._values.items():
+            key = const + key
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self.register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets))
+
+    def render(self, const_labels: Optional[Dict[str, str]] = None) -> str:
+        """Prometheus text exposition format (0.0.4); ``const_labels`` are added to every sample"""
+        return "\n".join(m.render(const_labels) for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    "ashborn_extraction_seconds", "Text extraction time per document, by file format")
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "ashborn_embedding_seconds", "Ollama embedding request latency, by priority class")
+FAISS_SEARCH_SECONDS = REGISTRY.histogram(
+    "ashborn_faiss_search_seconds", "FAISS index search time")
+LLM_GENERATION_SECONDS = REGISTRY.histogram(
+    "ashborn_llm_generation_seconds", "Ollama generation latency, by priority class")
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "ashborn_llm_tokens_per_second", "Ollama generation throughput reported by the model",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500))
+LLM_QUEUE_SECONDS = REGISTRY.histogram(
+    "ashborn_llm_queue_seconds", "Time requests wait in the LLM scheduler, by priority class")
+LLM_REQUESTS = REGISTRY.counter(
+    "ashborn_llm_requests_total", "LLM scheduler admissions, by priority class and outcome")
+
+INGESTED_DOCUMENTS = REGISTRY.counter(
+    "ashborn_ingested_documents_total", "Documents processed during indexing, by outcome")
+INGESTED_BYTES = REGISTRY.counter(
+    "ashborn_ingested_bytes_total", "Extracted text bytes processed during indexing")
+INDEX_VECTORS = REGISTRY.gauge(
+    "ashborn_index_vectors", "Vectors currently held in the FAISS index")
+INDEX_DOCUMENTS = REGISTRY.gauge(
+    "ashborn_index_documents", "Document entries in the vector store metadata")
+
+RERANK_SECONDS = REGISTRY.histogram(
+    "ashborn_rerank_seconds", "Re-ranking stage latency, including fallbacks")
+RERANK_REQUESTS = REGISTRY.counter(
+    "ashborn_rerank_requests_total", "Re-ranking attempts, by outcome (reranked/timeout/error)")
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "ashborn_cache_requests_total", "Cache lookups, by cache and result (hit/miss)")
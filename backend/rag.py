@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Tuple
+
+from dedup import content_hash
+
+# Rough chars-per-token ratio for the small local models we run; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def pack_context(results: List[Dict[str, Any]], token_budget: int = 1500,
+                 min_chunk_tokens: int = 50) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Pack retrieved chunks into a numbered context block within a token budget.
+    Chunks are taken in relevance order, duplicate text is dropped, and the
+    last chunk is truncated to fill the remaining budget.
+    """
+    blocks = []
+    sources = []
+    seen = set()
+    remaining = token_budget
+
+    for result in sorted(results, key=lambda r: r.get("score", 0.0), reverse=True):
+        snippet = (result.get("snippet") or "").strip()
+        if not snippet:
+            continue
+        digest = content_hash(snippet)
+        if digest in seen:
+            continue
+
+        source_id = len(sources) + 1
+        header = f"[{source_id}] {result['file_path']}\n"
+        available = remaining - estimate_tokens(header)
+        if available < min_chunk_tokens:
+            break
+        if estimate_tokens(snippet) > available:
+            snippet = snippet[:available * CHARS_PER_TOKEN]
+
+        seen.add(digest)
+        blocks.append(header + snippet)
+        sources.append({
+            "id": source_id,
+            "file_path": result["file_path"],
+            "score": result.get("score", 0.0),
+            "alternate_paths": result.get("alternate_paths", [])
+        })
+        remaining -= estimate_tokens(blocks[-1])
+
+    return "\n\n".join(blocks), sources
+
+
+@dataclass
+class Conversation:
+    conversation_id: str
+    context: str
+    sources: List[Dict[str, Any]]
+    # Token state returned by Ollama; lets follow-ups skip re-sending the documents
+    model_context: Optional[List[int]] = None
+    updated_at: float = field(default_factory=time.time)
+
+
+_CONVERSATION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class ConversationStore:
+    """
+    LRU of /ask conversations with idle expiry.
+
+    Held in memory by default. Given a ``storage_dir``, conversations are
+    kept as one JSON file each instead, so every worker process serving
+    the same storage sees follow-ups started on another.
+    """
+
+    def __init__(self, max_conversations: int = 256, ttl_seconds: float = 1800,
+                 storage_dir: Optional[str] = None):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.storage_dir = storage_dir
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+    def _path(self, conversation_id: str) -> Optional[str]:
+        # Ids come from clients; never let one name a path outside the store
+        if not _CONVERSATION_ID.fullmatch(conversation_id):
+            return None
+        return os.path.join(self.storage_dir, f"{conversation_id}.json")
+
+    def get(self, conversation_id: Optional[str]) -> Optional[Conversation]:
+        if not conversation_id:
+            return None
+        if self.storage_dir:
+            return self._load(conversation_id)
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        if time.time() - conversation.updated_at > self.ttl_seconds:
+            del self._conversations[conversation_id]
+            return None
+        conversation.updated_at = time.time()
+        self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def start(self, context: str, sources: List[Dict[str, Any]],
+              conversation_id: Optional[str] = None) -> Conversation:
+        if conversation_id and self.storage_dir and self._path(conversation_id) is None:
+            conversation_id = None
+        conversation = Conversation(
+            conversation_id=conversation_id or uuid.uuid4().hex,
+            context=context,
+            sources=sources
+        )
+        if self.storage_dir:
+            self.save(conversation)
+            self._prune()
+            return conversation
+        self._conversations[conversation.conversation_id] = conversation
+        self._conversations.move_to_end(conversation.conversation_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return conversation
+
+    def save(self, conversation: Conversation):
+        """Persist changes made after start(), such as new model_context; no-op in memory"""
+        if not self.storage_dir:
+            return
+        conversation.updated_at = time.time()
+        path = self._path(conversation.conversation_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(conversation), f)
+        os.replace(tmp_path, path)
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        path = self._path(conversation_id)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                conversation = Conversation(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if time.time() - conversation.updated_at > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return conversation
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.storage_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.storage_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.ttl_seconds
+        for index, (mtime, path) in enumerate(entries):
+            if index >= self.max_conversations or mtime < cutoff:
+                self._remove(path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,96 @@
+import json
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+from llm_client import LLMClient
+from llm_scheduler import INTERACTIVE
+from metrics import RERANK_SECONDS, RERANK_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMReranker:
+    """
+    Second-pass relevance scoring of vector search candidates.
+
+    All candidates are scored in one batched call to a small local model.
+    If that call misses the latency budget or fails, the original vector
+    order is returned unchanged.
+    """
+
+    def __init__(self, llm_client: LLMClient, model: Optional[str] = None,
+                 top_n: int = 20, budget_ms: float = 1500, passage_chars: int = 500):
+        self.llm_client = llm_client
+        self.model = model or llm_client.model_name
+        self.top_n = top_n
+        self.budget = budget_ms / 1000
+        self.passage_chars = passage_chars
+
+    def _build_prompt(self, query: str, candidates: List[Dict[str, Any]]) -> str:
+        passages = "\n\n".join(
+            f"[{i}] {c.get('snippet', '')[:self.passage_chars]}" for i, c in enumerate(candidates)
+        )
+        return f"""Rate how relevant each passage is to the search query on a scale from 0 to 10.
+
+Query: {query}
+
+Passages:
+{passages}
+
+Respond with JSON only, in the form {{"scores": [score for passage 0, score for passage 1, ...]}} with exactly {len(candidates)} numbers.
+"""
+
+    def _score(self, query: str, candidates: List[Dict[str, Any]], deadline: float) -> List[float]:
+        # The deadline also covers time queued in the scheduler, so a request whose
+        # result would be discarded is never sent
+        response = self.llm_client.post(
+            "generate",
+            {
+                "model": self.model,
+                "prompt": self._build_prompt(query, candidates),
+                "stream": False,
+                "format": "json",
+                "options": {"temperature": 0.0}
+            },
+            priority=INTERACTIVE,
+            deadline=deadline
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Re-rank request failed: {response.text}")
+
+        scores = json.loads(response.json().get("response", "{}")).get("scores")
+        if not isinstance(scores, list) or len(scores) != len(candidates):
+            raise ValueError(f"Expected {len(candidates)} scores, got {scores!r}")
+        return [float(s) for s in scores]
+
+    async def rerank(self, query: str, candidates: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Return the best ``limit`` candidates, re-scored when the budget allows"""
+        if len(candidates) <= 1:
+            return candidates[:limit]
+
+        pool = candidates[:self.top_n]
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.budget
+        try:
+            scores = await asyncio.wait_for(
+                asyncio.to_thread(self._score, query, pool, deadline), timeout=self.budget
+            )
+        except (asyncio.TimeoutError, TimeoutError):
+            RERANK_REQUESTS.inc(outcome="timeout")
+            RERANK_SECONDS.observe(time.perf_counter() - start)
+            logger.warning(f"Re-ranking exceeded {self.budget * 1000:.0f} ms budget; using vector order")
+            return candidates[:limit]
+        except Exception as e:
+            RERANK_REQUESTS.inc(outcome="error")
+            RERANK_SECONDS.observe(time.perf_counter() - start)
+            logger.error(f"Re-ranking failed, using vector order: {str(e)}")
+            return candidates[:limit]
+
+        RERANK_REQUESTS.inc(outcome="reranked")
+        RERANK_SECONDS.observe(time.perf_counter() - start)
+        # Stable sort keeps vector order among equal scores
+        order = sorted(range(len(pool)), key=lambda i: scores[i], reverse=True)
+        reranked = [{**pool[i], "rerank_score": scores[i]} for i in order]
+        return (reranked + candidates[len(pool):])[:limit]
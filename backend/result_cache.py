@@ -0,0 +1,64 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from metrics import CACHE_REQUESTS
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU of API responses tied to one index generation.
+    Seeing a newer generation drops every entry, so results never outlive the index they came from.
+    """
+
+    def __init__(self, name: str, max_bytes: int = 32 * 1024 * 1024):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.generation = None
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync_generation(self, generation: int) -> bool:
+        """Move to a newer generation; False if the caller is working from an older one"""
+        if self.generation is not None and generation < self.generation:
+            return False
+        if generation != self.generation:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.generation = generation
+        return True
+
+    def get(self, generation: int, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key) if self._sync_generation(generation) else None
+            if entry is None:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+            self._entries.move_to_end(key)
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return entry[0]
+
+    def put(self, generation: int, key: Hashable, value: Dict[str, Any]):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def __len__(self):
+        return len(self._entries)
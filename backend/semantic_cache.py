@@ -0,0 +1,93 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import faiss
+
+from metrics import CACHE_REQUESTS
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by query embedding rather than exact text.
+    A lookup hits when a stored query's cosine similarity reaches the
+    threshold; entries expire after a TTL and the least recently used
+    ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, name: str, threshold: float = 0.92, ttl_seconds: float = 3600,
+                 max_entries: int = 1000):
+        self.name = name
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index = None
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _prepare(self, embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.array([embedding], dtype=np.float32)
+        if vector.size == 0 or not np.any(vector):
+            # Zero vectors are the embedding fallback on LLM errors; never match or store them
+            return None
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, ids: List[int]):
+        if ids:
+            self.index.remove_ids(np.array(ids, dtype=np.int64))
+            for entry_id in ids:
+                self._entries.pop(entry_id, None)
+
+    def _evict(self):
+        now = time.time()
+        expired = [i for i, (_, created) in self._entries.items() if now - created > self.ttl_seconds]
+        self._remove(expired)
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            self._remove(list(self._entries.keys())[:overflow])
+
+    def lookup(self, embedding: List[float]) -> Optional[str]:
+        vector = self._prepare(embedding)
+        with self._lock:
+            if vector is None or self.index is None or self.index.ntotal == 0 \
+                    or vector.shape[1] != self.index.d:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+
+            scores, ids = self.index.search(vector, 1)
+            entry_id = int(ids[0][0])
+            entry = self._entries.get(entry_id)
+            if entry is None or scores[0][0] < self.threshold:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+            if time.time() - entry[1] > self.ttl_seconds:
+                self._remove([entry_id])
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return None
+
+            self._entries.move_to_end(entry_id)
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return entry[0]
+
+    def add(self, embedding: List[float], answer: str):
+        vector = self._prepare(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self.index is None or self.index.d != vector.shape[1]:
+                # Inner product on normalized vectors is cosine similarity
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+                self._entries.clear()
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (answer, time.time())
+            self._evict()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules, as when run from this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import FakeOllamaServer  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+from llm_scheduler import LLMScheduler  # noqa: E402
+
+
+@pytest.fixture
+def llm_client():
+    with FakeOllamaServer(dimension=32) as server:
+        yield LLMClient(base_url=server.base_url, scheduler=LLMScheduler())
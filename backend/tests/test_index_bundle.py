@@ -0,0 +1,104 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from vector_store import VectorStore, _remap_path
+
+
+def test_remap_matches_whole_components():
+    mapping = [("/srv/docs", "/mnt/docs")]
+    assert _remap_path("/srv/docs/x.txt", mapping) == os.path.join("/mnt/docs", "x.txt")
+    assert _remap_path("/srv/docs", mapping) == os.path.normpath("/mnt/docs")
+    assert _remap_path("/srv/docs2/x.txt", mapping) == "/srv/docs2/x.txt"
+
+
+def test_remap_ignores_trailing_separator_on_old():
+    assert _remap_path("/srv/docs/a/b.txt", [("/srv/docs/", "/mnt")]) == os.path.join("/mnt", "a", "b.txt")
+
+
+def test_remap_root():
+    assert _remap_path("/a/b.txt", [("/", "/mnt")]) == os.path.join("/mnt", "a", "b.txt")
+
+
+def test_remap_longest_prefix_wins():
+    mapping = [("/srv", "/x"), ("/srv/docs", "/y")]
+    assert _remap_path("/srv/docs/a.txt", mapping) == os.path.join("/y", "a.txt")
+    assert _remap_path("/srv/other/a.txt", mapping) == os.path.join("/x", "other", "a.txt")
+
+
+def test_remap_windows_to_posix():
+    mapping = [("C:\\share", "/srv/share")]
+    assert _remap_path("C:\\share\\docs\\x.txt", mapping) == os.path.join("/srv/share", "docs", "x.txt")
+
+
+def _corpus(root, files):
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    for name, text in files.items():
+        path = os.path.join(root, name)
+        with open(path, "w") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def _index(store, paths, folder):
+    for path in paths:
+        with open(path) as f:
+            assert store.add_document(path, f.read(), {"path": path})
+    store.commit([folder])
+
+
+REPORT = "quarterly budget report " * 20
+NOTES = "meeting notes about the schedule " * 20
+CONTRACT = "contract review and analysis " * 20
+
+
+def test_export_then_import_replaces_and_remaps(tmp_path, llm_client):
+    source_dir, target_dir = str(tmp_path / "source"), str(tmp_path / "target")
+    source = VectorStore(storage_dir=str(tmp_path / "a"), llm_client=llm_client)
+    _index(source, _corpus(source_dir, {"report.txt": REPORT, "notes.txt": NOTES}), source_dir)
+    manifest = source.export_bundle(str(tmp_path / "bundle"))
+    assert manifest["document_count"] == 2
+
+    # The corpus lives somewhere else on the importing machine
+    shutil.copytree(source_dir, target_dir)
+    target = VectorStore(storage_dir=str(tmp_path / "b"), llm_client=llm_client)
+    added = target.import_bundle(str(tmp_path / "bundle"), path_map=[(source_dir, target_dir)])
+
+    assert added == 2
+    assert target.indexed_folders == [target_dir]
+    results = asyncio.run(target.search(NOTES, limit=1))
+    assert [r["file_path"] for r in results] == [os.path.join(target_dir, "notes.txt")]
+
+    reader = VectorStore(storage_dir=str(tmp_path / "b"), llm_client=llm_client, read_only=True)
+    assert reader.doc_count == 2
+
+    with pytest.raises(FileExistsError):
+        source.export_bundle(str(tmp_path / "bundle"))
+
+
+def test_import_merge_dedups_and_rejects_corruption(tmp_path, llm_client):
+    first_dir, second_dir = str(tmp_path / "first"), str(tmp_path / "second")
+    store = VectorStore(storage_dir=str(tmp_path / "a"), llm_client=llm_client)
+    _index(store, _corpus(first_dir, {"report.txt": REPORT, "notes.txt": NOTES}), first_dir)
+
+    other = VectorStore(storage_dir=str(tmp_path / "b"), llm_client=llm_client)
+    _index(other, _corpus(second_dir, {"report-copy.txt": REPORT, "contract.txt": CONTRACT}), second_dir)
+    other.export_bundle(str(tmp_path / "bundle"))
+
+    added = store.import_bundle(str(tmp_path / "bundle"), merge=True)
+
+    assert added == 1
+    assert store.doc_count == store.index.ntotal == 3
+    assert sorted(store.indexed_folders) == sorted([first_dir, second_dir])
+    results = asyncio.run(store.search(REPORT, limit=1))
+    assert results[0]["file_path"] == os.path.join(first_dir, "report.txt")
+    assert results[0]["alternate_paths"] == [os.path.join(second_dir, "report-copy.txt")]
+
+    with open(tmp_path / "bundle" / "documents.json", "a") as f:
+        f.write(" ")
+    with pytest.raises(ValueError, match="Checksum"):
+        store.import_bundle(str(tmp_path / "bundle"), merge=True)
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_scheduler import LLMScheduler, SchedulerRejected, INTERACTIVE, BACKGROUND
+
+
+def _hold(scheduler, priority, started, release):
+    with scheduler.slot(priority):
+        started.set()
+        release.wait(5)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def test_interactive_starts_before_queued_background():
+    scheduler = LLMScheduler(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(scheduler, BACKGROUND, started, release))
+    holder.start()
+    started.wait(5)
+
+    order = []
+    background = threading.Thread(target=scheduler.run, args=(order.append, BACKGROUND), kwargs={"priority": BACKGROUND})
+    background.start()
+    _wait_for(lambda: scheduler.snapshot()[BACKGROUND]["waiting"] == 1)
+    interactive = threading.Thread(target=scheduler.run, args=(order.append, INTERACTIVE), kwargs={"priority": INTERACTIVE})
+    interactive.start()
+    _wait_for(lambda: scheduler.snapshot()[INTERACTIVE]["waiting"] == 1)
+
+    release.set()
+    for thread in (holder, background, interactive):
+        thread.join(5)
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_identical_requests_are_coalesced():
+    scheduler = LLMScheduler(max_concurrency=2)
+    calls = []
+    gate = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        gate.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scheduler.run(fetch, key="same")))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: scheduler.snapshot()[INTERACTIVE]["coalesced"] == 2)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["result"] * 3
+
+
+def test_full_queue_rejects():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue={BACKGROUND: 1})
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(scheduler, BACKGROUND, started, release))
+    holder.start()
+    started.wait(5)
+    queued = threading.Thread(target=scheduler.run, args=(lambda: None,), kwargs={"priority": BACKGROUND})
+    queued.start()
+    _wait_for(lambda: scheduler.snapshot()[BACKGROUND]["waiting"] == 1)
+
+    with pytest.raises(SchedulerRejected):
+        scheduler.run(lambda: None, priority=BACKGROUND)
+
+    release.set()
+    holder.join(5)
+    queued.join(5)
+
+
+class _SlowVectorStore:
+    """Stands in for VectorStore: every add holds a background slot like a real embedding"""
+
+    def __init__(self, scheduler, embed_seconds):
+        self.scheduler = scheduler
+        self.embed_seconds = embed_seconds
+        self.added = 0
+
+    def add_document(self, file_path, content, metadata):
+        with self.scheduler.slot(BACKGROUND):
+            time.sleep(self.embed_seconds)
+        self.added += 1
+        return True
+
+
+def test_indexing_does_not_delay_interactive_calls(tmp_path):
+    pytest.importorskip("unstructured")
+    from document_processor import DocumentProcessor
+
+    for i in range(100):
+        (tmp_path / f"doc{i}.txt").write_text(f"document {i}")
+    scheduler = LLMScheduler(max_concurrency=2)
+    store = _SlowVectorStore(scheduler, embed_seconds=0.02)
+    processor = DocumentProcessor(store, None)
+    processor.extract_text_sync = lambda path: f"text of {path}"
+
+    async def scenario():
+        indexing = asyncio.create_task(processor.process_folders([str(tmp_path)]))
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        # Interactive LLM calls reach the scheduler through asyncio's default thread pool
+        await asyncio.to_thread(scheduler.run, lambda: None, priority=INTERACTIVE)
+        elapsed = time.perf_counter() - start
+        still_indexing = not indexing.done()
+        await indexing
+        return elapsed, still_indexing
+
+    elapsed, still_indexing = asyncio.run(scenario())
+    assert still_indexing
+    assert elapsed < 0.5
+    assert store.added == 100
+
+
+def test_request_expires_while_queued():
+    scheduler = LLMScheduler(max_concurrency=1)
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(scheduler, INTERACTIVE, started, release))
+    holder.start()
+    started.wait(5)
+
+    calls = []
+    with pytest.raises(TimeoutError):
+        scheduler.run(calls.append, 1, deadline=time.monotonic() + 0.05)
+    release.set()
+    holder.join(5)
+
+    assert calls == []
+    assert scheduler.snapshot()[INTERACTIVE]["expired"] == 1
+
+
+def test_interactive_request_is_not_coalesced_with_queued_background(llm_client):
+    scheduler = llm_client.scheduler
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(scheduler, BACKGROUND, started, release))
+    holder.start()
+    started.wait(5)
+
+    payload = {"model": "nomic-embed-text", "prompt": "budget"}
+    background = threading.Thread(target=llm_client.post, args=("embeddings", payload),
+                                  kwargs={"priority": BACKGROUND})
+    background.start()
+    _wait_for(lambda: scheduler.snapshot()[BACKGROUND]["waiting"] == 1)
+
+    start = time.perf_counter()
+    response = llm_client.post("embeddings", payload, priority=INTERACTIVE, timeout=5)
+    elapsed = time.perf_counter() - start
+    release.set()
+    holder.join(5)
+    background.join(5)
+
+    assert response.status_code == 200
+    assert elapsed < 1
+    assert scheduler.snapshot()[INTERACTIVE]["coalesced"] == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+from vector_store import VectorStore
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_identical_copy_becomes_alternate_path(tmp_path, llm_client):
+    store = VectorStore(storage_dir=str(tmp_path / "store"), llm_client=llm_client)
+    report = "quarterly budget report " * 20
+    original = _write(tmp_path / "report.txt", report)
+    copy = _write(tmp_path / "report-copy.txt", report)
+    other = _write(tmp_path / "notes.txt", "meeting notes about the schedule " * 20)
+
+    for path in (original, copy, other):
+        assert store.add_document(path, open(path).read(), {"path": path})
+
+    assert store.doc_count == 2
+    assert store.index.ntotal == 2
+
+    results = asyncio.run(store.search(report, limit=2))
+    assert [r["file_path"] for r in results] == [original, other]
+    assert results[0]["alternate_paths"] == [copy]
+
+
+def test_search_by_content_finds_related_documents(tmp_path, llm_client):
+    store = VectorStore(storage_dir=str(tmp_path / "store"), llm_client=llm_client)
+    text = "project revenue analysis " * 20
+    path = _write(tmp_path / "analysis.txt", text)
+    store.add_document(path, text, {"path": path})
+
+    results = asyncio.run(store.search_by_content(text, limit=1))
+    assert [r["file_path"] for r in results] == [path]
+
+
+def test_add_document_reembeds_when_model_switches_mid_embedding(tmp_path, llm_client):
+    import faiss
+
+    store = VectorStore(storage_dir=str(tmp_path / "store"), llm_client=llm_client)
+    requested = []
+    embed = llm_client.get_embedding
+
+    def switching_embedding(text, priority=None, model=None):
+        requested.append(model)
+        if len(requested) == 1:
+            # What reembed() does when it swaps in the rebuilt index
+            with store._lock:
+                store.index = faiss.IndexFlatL2(16)
+                store.dimension = 16
+                store.embedding_model = {"name": "other-embed", "version": "v2"}
+        return embed(text, priority=priority, model=model)
+
+    llm_client.get_embedding = switching_embedding
+    assert store.add_document(str(tmp_path / "a.txt"), "contract review " * 20, {})
+
+    assert requested == ["nomic-embed-text", "other-embed"]
+    assert store.index.ntotal == 1
+    assert store.doc_count == 1
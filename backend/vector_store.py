@@ -1,59 +1,184 @@
 import os
+import re
 import json
 import asyncio
 import numpy as np
 import faiss
 import logging
 import pickle
+import shutil
+import hashlib
+import threading
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
 
 from llm_client import LLMClient
+from llm_scheduler import SchedulerRejected, BACKGROUND
+from dedup import content_hash, MinHashIndex
+from metrics import FAISS_SEARCH_SECONDS, INDEX_VECTORS, INDEX_DOCUMENTS, CACHE_REQUESTS
 
 logger = logging.getLogger(__name__)
 
+# Pointer file naming the snapshot read-only workers should serve; replaced atomically
+CURRENT_SNAPSHOT_FILE = "CURRENT"
+SNAPSHOTS_DIR = "snapshots"
+SNAPSHOTS_TO_KEEP = 2
+
+BUNDLE_FORMAT = "ashborn-index-bundle"
+BUNDLE_VERSION = 1
+
+
+def _read_index_mmap(path: str):
+    """Memory-map a FAISS index read-only where this faiss build supports it"""
+    # IO_FLAG_MMAP alone does not map flat indexes; IO_FLAG_MMAP_IFC in newer releases does
+    if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        logger.warning(f"faiss {faiss.__version__} cannot memory-map flat indexes; "
+                       f"each process loads a private copy of {path}")
+        return faiss.read_index(path)
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    except Exception as e:
+        logger.warning(f"Memory-mapped index load failed, reading into memory: {e}")
+        return faiss.read_index(path)
+
+
+def _write_file(data, path: str):
+    # Write-then-rename: never modify a published (possibly hard-linked or mapped) file in place
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _install_file(src: str, dst: str):
+    """Place src at dst through a hard link when on the same filesystem, else a copy"""
+    tmp_path = dst + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remap_path(path: str, path_map: List[Tuple[str, str]]) -> str:
+    # Longest prefix wins so nested mappings can override broader ones
+    for old, new in sorted(path_map, key=lambda m: len(m[0].rstrip("/\\")), reverse=True):
+        prefix = old.rstrip("/\\")
+        # Match whole path components: /srv/docs covers /srv/docs/a but not /srv/docs2.
+        # Bundles may come from another OS, so either separator counts.
+        if path != prefix and not path.startswith((prefix + "/", prefix + "\\")):
+            continue
+        parts = [part for part in re.split(r"[/\\]", path[len(prefix):]) if part]
+        return os.path.normpath(os.path.join(new, *parts))
+    return path
+
 
 class VectorStore:
-    def __init__(self, dimension: int = None, storage_dir: str = None):
-        self.llm_client = LLMClient()
+    def __init__(self, dimension: int = None, storage_dir: str = None,
+                 near_duplicate_threshold: Optional[float] = None, read_only: bool = False,
+                 llm_client: Optional[LLMClient] = None):
+        self.llm_client = llm_client or LLMClient()
         test_embedding = self.llm_client.get_embedding("test")
         if not isinstance(test_embedding, (list, np.ndarray)):
             raise ValueError("Invalid embedding returned from LLM for dimension check.")
 
         self.dimension = dimension or len(test_embedding)
+        # Model the stored vectors come from; queries must be embedded with the same one.
+        # When it differs from the configured model the index is queued for a re-embed.
+        self._model_dimension = self.dimension
+        self.embedding_model = self.llm_client.embedding_model_info()
+        self.reembed_required = False
         self.storage_dir = storage_dir or os.path.join(os.path.expanduser("~"), ".ai_document_assistant")
         os.makedirs(self.storage_dir, exist_ok=True)
 
         self.index = faiss.IndexFlatL2(self.dimension)
         self.documents = {}
         self.doc_count = 0
+        self.content_hashes = {}
+        # Bumped on every commit or reset so readers and caches can tell index versions apart
+        self.generation = 0
+        self.indexed_folders = []
+        # Read-only stores serve the latest committed snapshot and never write
+        self.read_only = read_only
+        self._snapshot_mtime = None
+        # Near-duplicate detection is opt-in: MinHash signatures cost CPU on every add
+        self.near_duplicates = MinHashIndex(near_duplicate_threshold) if near_duplicate_threshold else None
+        # Guards the in-memory index and metadata; held only for memory work, never disk I/O
+        self._lock = threading.RLock()
+        # Orders disk writes (checkpoints, commits) so an older state never overwrites a newer one.
+        # Always taken before _lock, never while holding it.
+        self._write_lock = threading.Lock()
 
-        self._load_index()
+        if self.read_only:
+            self.refresh()
+        else:
+            self._load_index()
 
     def add_document(self, file_path: str, content: str, metadata: Dict[str, Any]) -> bool:
+        if self.read_only:
+            raise RuntimeError("Cannot add documents to a read-only vector store")
         try:
-            embedding = self.llm_client.get_embedding(content)
-            if not isinstance(embedding, (list, np.ndarray)):
-                raise ValueError("Invalid embedding type")
+            digest = content_hash(content)
+            signature = None
+            if self.near_duplicates is not None and digest not in self.content_hashes:
+                signature = self.near_duplicates.hasher.signature(content)
+            if self._attach_duplicate(digest, signature, file_path):
+                CACHE_REQUESTS.inc(cache="content_dedup", result="hit")
+                return True
+            CACHE_REQUESTS.inc(cache="content_dedup", result="miss")
 
-            vector = self._prepare_vector(embedding)
-            vector = np.array([vector], dtype=np.float32)
-            faiss.normalize_L2(vector)
+            while True:
+                # A re-embed or reset may switch models while we wait on the LLM; the vector
+                # must come from the model the index holds when it is added
+                model = self.embedding_model
+                # Indexing is background work: interactive requests take precedence at the LLM
+                embedding = self.llm_client.get_embedding(content, priority=BACKGROUND, model=model["name"])
+                if not isinstance(embedding, (list, np.ndarray)):
+                    raise ValueError("Invalid embedding type")
 
-            self.index.add(vector)
+                with self._lock:
+                    if self.embedding_model != model:
+                        logger.debug(f"Embedding model changed while embedding {file_path}; retrying")
+                        continue
 
-            doc_id = self.doc_count
-            self.documents[doc_id] = {
-                "file_path": file_path,
-                "metadata": metadata,
-                "snippet": content[:1000],
-                "timestamp": datetime.now().isoformat()
-            }
+                    # The same content may have been stored by another thread while we embedded
+                    if self._attach_duplicate(digest, signature, file_path):
+                        return True
 
-            self.doc_count += 1
-            if self.doc_count % 50 == 0:
-                self._save_index()
+                    vector = np.array([self._prepare_vector(embedding)], dtype=np.float32)
+                    faiss.normalize_L2(vector)
+                    self.index.add(vector)
+
+                    doc_id = self.doc_count
+                    self.documents[doc_id] = {
+                        "file_path": file_path,
+                        "metadata": metadata,
+                        "snippet": content[:1000],
+                        "content_hash": digest,
+                        "alternate_paths": [],
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    self.content_hashes[digest] = doc_id
+                    if signature is not None:
+                        self.near_duplicates.add(doc_id, signature)
 
+                    self.doc_count += 1
+                    self._update_size_metrics()
+                    checkpoint = self.doc_count % 50 == 0
+                break
+
+            if checkpoint:
+                self._save_index()
             return True
         except Exception as e:
             logger.error(f"Error adding document: {e}")
@@ -61,8 +186,12 @@ class VectorStore:
 
     async def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         try:
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(None, self.llm_client.get_embedding, query)
+            if self.read_only:
+                await asyncio.to_thread(self.refresh)
+
+            embedding = await asyncio.to_thread(
+                self.llm_client.get_embedding, query, model=self.embedding_model["name"]
+            )
             if not isinstance(embedding, (list, np.ndarray)):
                 raise ValueError("Invalid embedding type")
 
@@ -70,31 +199,416 @@ class VectorStore:
             query_vector = np.array([query_vector], dtype=np.float32)
             faiss.normalize_L2(query_vector)
 
+            # The scan can wait on the lock behind a writer, so keep it off the event loop
+            return await asyncio.to_thread(self._search_vector, query_vector, limit)
+        except SchedulerRejected:
+            raise
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            return []
+
+    async def search_by_content(self, content: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Documents most similar to a whole document's text, embedded the same way it was indexed"""
+        return await self.search(content, limit=limit)
+
+    def _search_vector(self, query_vector: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
             if self.index.ntotal == 0:
                 return []
 
-            distances, indices = self.index.search(query_vector, min(limit * 2, self.index.ntotal))
+            with FAISS_SEARCH_SECONDS.time():
+                distances, indices = self.index.search(query_vector, min(limit * 2, self.index.ntotal))
             return self._format_results(indices[0], distances[0], limit)
-        except Exception as e:
-            logger.error(f"Search failed: {e}")
-            return []
     
 
+    def _attach_duplicate(self, digest: str, signature: Optional[np.ndarray], file_path: str) -> bool:
+        with self._lock:
+            existing_id = self.content_hashes.get(digest)
+            if existing_id is None and signature is not None:
+                existing_id = self.near_duplicates.query(signature)
+            if existing_id is None or existing_id not in self.documents:
+                return False
+            self._add_alternate_path(existing_id, file_path)
+            return True
+
+    def _add_alternate_path(self, doc_id: int, file_path: str):
+        doc = self.documents[doc_id]
+        if file_path != doc["file_path"] and file_path not in doc.setdefault("alternate_paths", []):
+            doc["alternate_paths"].append(file_path)
+            logger.debug(f"Duplicate content: {file_path} -> {doc['file_path']}")
+
     def reset(self):
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = {}
-        self.doc_count = 0
+        if self.read_only:
+            raise RuntimeError("Cannot reset a read-only vector store")
+        with self._write_lock:
+            with self._lock:
+                self.generation += 1
+                self.indexed_folders = []
+                # An empty index can move to the configured embedding model straight away
+                self.dimension = self._model_dimension
+                self.embedding_model = self.llm_client.embedding_model_info()
+                self.reembed_required = False
+                self.index = faiss.IndexFlatL2(self.dimension)
+                self.documents = {}
+                self.doc_count = 0
+                self.content_hashes = {}
+                if self.near_duplicates is not None:
+                    self.near_duplicates.clear()
+                self._update_size_metrics()
+
+            for fname in ["index.faiss", "documents.pickle"]:
+                fpath = os.path.join(self.storage_dir, fname)
+                if os.path.exists(fpath):
+                    os.remove(fpath)
+
+    def _update_size_metrics(self):
+        INDEX_VECTORS.set(self.index.ntotal)
+        INDEX_DOCUMENTS.set(len(self.documents))
+
+    async def reembed(self, extract_text: Callable[[str], Awaitable[str]]):
+        """
+        Rebuild every vector with the configured embedding model in the background.
+        Searches keep using the old index and model until the new one is swapped in and committed.
+        """
+        if self.read_only:
+            raise RuntimeError("Cannot re-embed a read-only vector store")
+
+        target = self.llm_client.embedding_model_info()
+        logger.info(f"Re-embedding {self.doc_count} documents with {target['name']}")
+        documents = self.documents
+        new_index = faiss.IndexFlatL2(self._model_dimension)
+        new_documents, new_hashes, new_signatures = {}, {}, {}
+        processed = 0
+
+        while True:
+            with self._lock:
+                if self.documents is not documents:
+                    logger.info("Index was reset during re-embedding; abandoning it")
+                    return
+                pending = [(i, self.documents[i]) for i in range(processed, self.doc_count) if i in self.documents]
+                if not pending and processed == self.doc_count:
+                    # Caught up with concurrent indexing: swap atomically under the lock
+                    self.index = new_index
+                    self.documents = new_documents
+                    self.content_hashes = new_hashes
+                    if self.near_duplicates is not None:
+                        self.near_duplicates.clear()
+                        for doc_id, signature in new_signatures.items():
+                            self.near_duplicates.add(doc_id, signature)
+                    self.doc_count = len(new_documents)
+                    self.dimension = self._model_dimension
+                    self.embedding_model = target
+                    self.reembed_required = False
+                    self._update_size_metrics()
+                    break
+                upper = self.doc_count
 
-        for fname in ["index.faiss", "documents.pickle"]:
-            fpath = os.path.join(self.storage_dir, fname)
-            if os.path.exists(fpath):
-                os.remove(fpath)
+            for doc_id, doc in pending:
+                content = None
+                for path in [doc["file_path"]] + doc.get("alternate_paths", []):
+                    try:
+                        content = await extract_text(path)
+                        break
+                    except Exception:
+                        continue
+                # Files that disappeared keep their stored snippet rather than vanishing from search
+                content = content or doc.get("snippet", "")
+                if not content.strip():
+                    continue
+
+                embedding = await asyncio.to_thread(
+                    self.llm_client.get_embedding, content, priority=BACKGROUND, model=target["name"]
+                )
+                vector = np.array([embedding], dtype=np.float32)
+                if vector.shape[1] != self._model_dimension or not np.any(vector):
+                    # Embedding failed; keep serving the old index and retry on next start
+                    logger.error(f"Re-embedding failed for {doc['file_path']}; keeping the current index")
+                    return
+                faiss.normalize_L2(vector)
+
+                new_id = len(new_documents)
+                new_index.add(vector)
+                new_documents[new_id] = doc
+                doc.setdefault("content_hash", content_hash(content))
+                new_hashes[doc["content_hash"]] = new_id
+                if self.near_duplicates is not None and doc_id in self.near_duplicates.signatures:
+                    new_signatures[new_id] = self.near_duplicates.signatures[doc_id]
+            processed = upper
+
+        await asyncio.to_thread(self.commit, self.indexed_folders)
+        logger.info(f"Re-embedding finished: {self.doc_count} documents on {target['name']}")
+
+    def commit(self, indexed_folders: List[str], index_source: Optional[str] = None):
+        """
+        Persist the index and publish it as a new snapshot generation.
+        Read-only stores in other processes pick it up on their next search.
+        ``index_source`` names an index file identical to ``self.index`` to link instead of rewriting.
+        """
+        if self.read_only:
+            raise RuntimeError("Cannot commit a read-only vector store")
+        with self._write_lock:
+            with self._lock:
+                self.generation += 1
+                self.indexed_folders = list(indexed_folders)
+                generation = self.generation
+                index_bytes, state_bytes = self._serialize(index_source)
+            snapshot_dir = self._publish_snapshot(generation, index_bytes, state_bytes, index_source)
+            # Link the working copy to the snapshot's files instead of writing the index twice
+            self._link_working_copy(snapshot_dir)
+
+    def export_bundle(self, bundle_dir: str) -> Dict[str, Any]:
+        """
+        Write a self-contained, versioned bundle: the FAISS index, document
+        metadata as JSON, and a manifest with model info and checksums.
+        """
+        if os.path.exists(os.path.join(bundle_dir, "manifest.json")):
+            raise FileExistsError(f"A bundle already exists in {bundle_dir}")
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        with self._lock:
+            index_bytes = faiss.serialize_index(self.index)
+            documents_json = json.dumps([self.documents[i] for i in range(self.doc_count)], default=str)
+            manifest = {
+                "format": BUNDLE_FORMAT,
+                "format_version": BUNDLE_VERSION,
+                "created": datetime.now().isoformat(),
+                "document_count": self.doc_count,
+                "dimension": self.dimension,
+                "embedding_model": self.embedding_model,
+                "indexed_folders": self.indexed_folders
+            }
+
+        _write_file(index_bytes, os.path.join(bundle_dir, "index.faiss"))
+        _write_file(documents_json.encode("utf-8"), os.path.join(bundle_dir, "documents.json"))
+        manifest["files"] = {
+            name: _sha256_file(os.path.join(bundle_dir, name)) for name in ("index.faiss", "documents.json")
+        }
+        with open(os.path.join(bundle_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def import_bundle(self, bundle_dir: str, path_map: Optional[List[Tuple[str, str]]] = None,
+                      merge: bool = False, verify: bool = True) -> int:
+        """
+        Load a bundle written by export_bundle, remapping its paths.
+        Replacing hard-links the bundle's index file into place so readers map it without a copy;
+        merging streams its vectors in batches and folds duplicate content into alternate paths.
+        Returns the number of vectors added.
+        """
+        if self.read_only:
+            raise RuntimeError("Cannot import into a read-only vector store")
+        path_map = path_map or []
+
+        with open(os.path.join(bundle_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{bundle_dir} is not an index bundle")
+        if manifest.get("format_version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"Bundle format {manifest['format_version']} is newer than supported ({BUNDLE_VERSION})")
+        if verify:
+            for name, checksum in manifest["files"].items():
+                if _sha256_file(os.path.join(bundle_dir, name)) != checksum:
+                    raise ValueError(f"Checksum mismatch for {name}; bundle is corrupt")
+
+        with open(os.path.join(bundle_dir, "documents.json"), encoding="utf-8") as f:
+            documents = json.load(f)
+        for doc in documents:
+            doc["file_path"] = _remap_path(doc["file_path"], path_map)
+            doc["alternate_paths"] = [_remap_path(p, path_map) for p in doc.get("alternate_paths", [])]
+            if "path" in doc.get("metadata", {}):
+                doc["metadata"]["path"] = _remap_path(doc["metadata"]["path"], path_map)
+        folders = [_remap_path(p, path_map) for p in manifest.get("indexed_folders", [])]
+        index_path = os.path.join(bundle_dir, "index.faiss")
+
+        if merge and self.doc_count > 0:
+            with self._lock:
+                added = self._merge_bundle(index_path, manifest, documents)
+                folders = sorted(set(self.indexed_folders) | set(folders))
+            self.commit(folders)
+            return added
+
+        bundle_index = faiss.read_index(index_path)
+        with self._lock:
+            self.index = bundle_index
+            self._apply_state({
+                "documents": dict(enumerate(documents)),
+                "doc_count": len(documents),
+                "content_hashes": {d["content_hash"]: i for i, d in enumerate(documents) if d.get("content_hash")},
+                "generation": self.generation,
+                "indexed_folders": folders,
+                "embedding_model": manifest.get("embedding_model")
+            })
+            self._update_size_metrics()
+            # An empty bundle for another model is swapped for a fresh index; link only the unchanged one
+            index_source = index_path if self.index is bundle_index else None
+        self.commit(folders, index_source=index_source)
+        return len(documents)
+
+    def _merge_bundle(self, index_path: str, manifest: Dict[str, Any], documents: List[Dict[str, Any]]) -> int:
+        bundle_model = (manifest.get("embedding_model") or {}).get("name")
+        if bundle_model != self.embedding_model["name"] or manifest["dimension"] != self.dimension:
+            raise ValueError(
+                f"Bundle was embedded with {bundle_model} ({manifest['dimension']}d) but this index uses "
+                f"{self.embedding_model['name']} ({self.dimension}d); replace instead of merging"
+            )
+
+        bundle_index = _read_index_mmap(index_path)
+        added = 0
+        for start in range(0, bundle_index.ntotal, 10000):
+            count = min(10000, bundle_index.ntotal - start)
+            vectors = bundle_index.reconstruct_n(start, count)
+            keep = []
+            for offset, doc in enumerate(documents[start:start + count]):
+                existing_id = self.content_hashes.get(doc.get("content_hash"))
+                if existing_id is not None:
+                    for path in [doc["file_path"]] + doc.get("alternate_paths", []):
+                        self._add_alternate_path(existing_id, path)
+                    continue
+                doc_id = self.doc_count
+                self.documents[doc_id] = doc
+                if doc.get("content_hash"):
+                    self.content_hashes[doc["content_hash"]] = doc_id
+                self.doc_count += 1
+                keep.append(offset)
+            if keep:
+                self.index.add(np.ascontiguousarray(vectors[keep]))
+                added += len(keep)
+        self._update_size_metrics()
+        return added
+
+    def refresh(self, force: bool = False) -> bool:
+        """Swap in the latest committed snapshot if it changed; returns True if reloaded"""
+        current_path = os.path.join(self.storage_dir, CURRENT_SNAPSHOT_FILE)
+        try:
+            mtime = os.stat(current_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if not force and mtime == self._snapshot_mtime:
+            return False
+
+        try:
+            with open(current_path) as f:
+                pointer = json.load(f)
+            if not force and pointer["generation"] == self.generation:
+                self._snapshot_mtime = mtime
+                return False
+
+            snapshot_dir = os.path.join(self.storage_dir, pointer["snapshot"])
+            index = _read_index_mmap(os.path.join(snapshot_dir, "index.faiss"))
+            with open(os.path.join(snapshot_dir, "documents.pickle"), "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Loading index snapshot failed: {e}")
+            return False
+
+        # Build the new state fully before swapping so concurrent searches see old or new, never a mix
+        with self._lock:
+            self.index = index
+            self._apply_state(data)
+            self._snapshot_mtime = mtime
+            self._update_size_metrics()
+        logger.info(f"Loaded index snapshot generation {self.generation}")
+        return True
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "doc_count": self.doc_count,
+            "content_hashes": self.content_hashes,
+            "signatures": self.near_duplicates.signatures if self.near_duplicates else {},
+            "generation": self.generation,
+            "indexed_folders": self.indexed_folders,
+            "embedding_model": self.embedding_model
+        }
+
+    def _apply_state(self, data: Dict[str, Any]):
+        self.documents = data["documents"]
+        self.doc_count = data["doc_count"]
+        self.content_hashes = data.get("content_hashes", {})
+        self.generation = data.get("generation", 0)
+        self.indexed_folders = data.get("indexed_folders", [])
+        if self.near_duplicates is not None:
+            self.near_duplicates.clear()
+            for doc_id, signature in data.get("signatures", {}).items():
+                self.near_duplicates.add(doc_id, signature)
+
+        # Indexes from before model routing were embedded with the generation model
+        self.embedding_model = data.get("embedding_model") or {
+            "name": self.llm_client.model_name, "version": "unknown"
+        }
+        self.dimension = self.index.d
+        configured = self.llm_client.embedding_model_info()
+        versions_differ = "unknown" not in (configured["version"], self.embedding_model["version"]) \
+            and configured["version"] != self.embedding_model["version"]
+        self.reembed_required = configured["name"] != self.embedding_model["name"] or versions_differ
+        if self.reembed_required and not self.read_only and self.doc_count == 0:
+            self.index = faiss.IndexFlatL2(self._model_dimension)
+            self.dimension = self._model_dimension
+            self.embedding_model = configured
+            self.reembed_required = False
+        if self.reembed_required and not self.read_only:
+            logger.warning(
+                f"Index was embedded with {self.embedding_model['name']} but {configured['name']} "
+                f"is configured; serving with the old model until re-embedding finishes"
+            )
+
+    def _serialize(self, index_source: Optional[str] = None):
+        """In-memory copy of the index and metadata; call under _lock, then write without it"""
+        index_bytes = None if index_source else faiss.serialize_index(self.index)
+        return index_bytes, pickle.dumps(self._state())
+
+    def _write_files(self, directory: str, index_bytes, state_bytes: bytes, index_source: Optional[str] = None):
+        if index_source:
+            _install_file(index_source, os.path.join(directory, "index.faiss"))
+        else:
+            _write_file(index_bytes, os.path.join(directory, "index.faiss"))
+        _write_file(state_bytes, os.path.join(directory, "documents.pickle"))
+
+    def _publish_snapshot(self, generation: int, index_bytes, state_bytes: bytes,
+                          index_source: Optional[str] = None):
+        snapshots_root = os.path.join(self.storage_dir, SNAPSHOTS_DIR)
+        name = f"{generation:08d}"
+        snapshot_dir = os.path.join(snapshots_root, name)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self._write_files(snapshot_dir, index_bytes, state_bytes, index_source)
+
+        current_path = os.path.join(self.storage_dir, CURRENT_SNAPSHOT_FILE)
+        tmp_path = current_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"generation": generation, "snapshot": os.path.join(SNAPSHOTS_DIR, name)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, current_path)
+
+        # Keep the previous snapshot around for readers still switching over
+        for old in sorted(os.listdir(snapshots_root))[:-SNAPSHOTS_TO_KEEP]:
+            old_dir = os.path.join(snapshots_root, old)
+            try:
+                for fname in os.listdir(old_dir):
+                    os.remove(os.path.join(old_dir, fname))
+                os.rmdir(old_dir)
+            except OSError as e:
+                # Windows refuses to delete files a reader still has mapped; retry next commit
+                logger.debug(f"Could not remove old snapshot {old}: {e}")
+        return snapshot_dir
 
     def _save_index(self):
+        with self._write_lock:
+            with self._lock:
+                index_bytes, state_bytes = self._serialize()
+            self._write_working_copy(index_bytes, state_bytes)
+
+    def _write_working_copy(self, index_bytes, state_bytes: bytes):
         try:
-            faiss.write_index(self.index, os.path.join(self.storage_dir, "index.faiss"))
-            with open(os.path.join(self.storage_dir, "documents.pickle"), "wb") as f:
-                pickle.dump({"documents": self.documents, "doc_count": self.doc_count}, f)
+            self._write_files(self.storage_dir, index_bytes, state_bytes)
+        except Exception as e:
+            logger.error(f"Saving vector store failed: {e}")
+
+    def _link_working_copy(self, snapshot_dir: str):
+        # Checkpoints replace these links with new files, so the snapshot is never modified
+        try:
+            for fname in ("index.faiss", "documents.pickle"):
+                _install_file(os.path.join(snapshot_dir, fname), os.path.join(self.storage_dir, fname))
         except Exception as e:
             logger.error(f"Saving vector store failed: {e}")
 
@@ -105,11 +619,15 @@ class VectorStore:
             if os.path.exists(index_path) and os.path.exists(docs_path):
                 self.index = faiss.read_index(index_path)
                 with open(docs_path, "rb") as f:
-                    data = pickle.load(f)
-                    self.documents = data["documents"]
-                    self.doc_count = data["doc_count"]
+                    self._apply_state(pickle.load(f))
+            # Never reuse a generation number that readers may already have seen
+            current_path = os.path.join(self.storage_dir, CURRENT_SNAPSHOT_FILE)
+            if os.path.exists(current_path):
+                with open(current_path) as f:
+                    self.generation = max(self.generation, json.load(f)["generation"])
         except Exception as e:
             logger.error(f"Loading vector store failed: {e}")
+        self._update_size_metrics()
 
     def _prepare_vector(self, embedding: List[float]) -> np.ndarray:
         embedding = np.array(embedding, dtype=np.float32)
@@ -128,15 +646,20 @@ class VectorStore:
             doc = self.documents.get(int(idx))
             if not doc:
                 continue
-            path = doc["file_path"]
-            if path in seen or not os.path.exists(path):
+            paths = [doc["file_path"]] + doc.get("alternate_paths", [])
+            if any(p in seen for p in paths):
+                continue
+            # Serve the hit from the first copy that still exists on disk
+            path = next((p for p in paths if os.path.exists(p)), None)
+            if path is None:
                 continue
-            seen.add(path)
+            seen.update(paths)
             results.append({
                 "file_path": path,
                 "score": float(1.0 / (1.0 + distances[i])),
                 "snippet": doc["snippet"],
-                "metadata": doc["metadata"]
+                "metadata": doc["metadata"],
+                "alternate_paths": [p for p in paths if p != path]
             })
             if len(results) >= limit:
                 break